@@ -0,0 +1,261 @@
+"""Micro-benchmarks of candidate generation and of every filter, with regression thresholds.
+
+    python benchmarks/bench_hot_paths.py --output results.json --check
+
+Every benchmark runs over the same synthetic docs, whose length, lemma repetition (share of function words) and dependency depth are set on the command line. Candidates are the MWEs of the synthetic lexicon whose lemmas all occur in a doc, filters get their data compiled and a `DocView` of the doc, as in `MWEDetector`.
+Absolute times depend on the machine, so every benchmark is also reported relative to a reference loop over the same candidates, measured in the same run. Relative times are the median over the repetitions, each relative to a run of the reference right before. `thresholds.json` holds the relative times of the configuration it was recorded with (`--record`), and a benchmark regresses when its relative time exceeds the recorded one by more than the recorded tolerance. Relative times still depend on the configuration, so other configurations are not checked.
+The default filter costs of `mwe_detector/plans.py` are checked against the relative times of the filters, scaled to the reference loop the defaults were measured with, in the configuration of `thresholds.json`. Defaults off by more than the tolerance are reported, but don't fail `--check`.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+import spacy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_doc, make_lexicon, make_vocabulary  # noqa: E402
+
+from mwe_detector.lexicon import FILTER_TYPES  # noqa: E402
+from mwe_detector.plans import (  # noqa: E402
+    BENCHMARK_REFERENCE_US,
+    DEFAULT_FILTER_STATS,
+)
+from mwe_detector.utils import (  # noqa: E402
+    find_candidate_matches,
+    find_continuous_candidate_matches,
+    get_lemma_positions,
+)
+from mwe_detector.view import DocView  # noqa: E402
+
+THRESHOLDS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "thresholds.json"
+)
+# Relative times vary by about 20% between runs on the same machine
+TOLERANCE = 1.5
+# Arguments that define the configuration the thresholds are recorded for
+CONFIG_ARGS = (
+    "n_docs",
+    "doc_length",
+    "function_word_share",
+    "max_depth",
+    "lexicon_size",
+)
+
+
+def _us_per_call(run: Callable[[], int]) -> tuple[int, float]:
+    start = time.perf_counter()
+    calls = run()
+    seconds = time.perf_counter() - start
+    return calls, seconds / calls * 1e6 if calls else 0.0
+
+
+def _time(
+    run: Callable[[], int], reference: Callable[[], int], repeat: int
+) -> dict[str, Any]:
+    """Best time per call of `repeat` runs of `run`, which returns the number of calls it made, and the median of its times relative to a run of `reference` right before."""
+    calls = 0
+    times: list[float] = []
+    relative: list[float] = []
+    for _ in range(repeat):
+        _, reference_time = _us_per_call(reference)
+        calls, us_per_call = _us_per_call(run)
+        times.append(us_per_call)
+        relative.append(us_per_call / reference_time if reference_time else 0.0)
+    return {
+        "calls": calls,
+        "us_per_call": min(times),
+        "relative": statistics.median(relative),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-docs", type=int, default=500)
+    parser.add_argument("--doc-length", type=int, default=30)
+    parser.add_argument("--function-word-share", type=float, default=0.3)
+    parser.add_argument("--max-depth", type=int, default=4)
+    parser.add_argument("--lexicon-size", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=str, help="Writes the results as JSON.")
+    parser.add_argument("--thresholds", type=str, default=THRESHOLDS_PATH)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exits with status 1 if a benchmark exceeds its threshold.",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Writes the relative times of this run as thresholds.",
+    )
+    args = parser.parse_args()
+    config = {name: getattr(args, name) for name in CONFIG_ARGS}
+
+    vocabulary = make_vocabulary()
+    nlp = spacy.blank("fr")
+    docs = [
+        make_doc(
+            nlp.vocab,
+            args.doc_length,
+            vocabulary,
+            seed=i,
+            function_word_share=args.function_word_share,
+            max_depth=args.max_depth,
+        )
+        for i in range(args.n_docs)
+    ]
+    lexicon = make_lexicon(args.lexicon_size, vocabulary)["mwes"]
+    by_anchor: dict[str, list[dict[str, Any]]] = {}
+    for mwe in lexicon.values():
+        by_anchor.setdefault(mwe["lemmas"][0], []).append(mwe)  # type: ignore
+
+    # (doc, token lemmas, MWE) of every MWE whose lemmas all occur in a doc
+    lookups: list[tuple[int, list[str], dict[str, Any]]] = []
+    for i, doc in enumerate(docs):
+        token_lemmas = [tok.lemma_ for tok in doc]
+        present = set(token_lemmas)
+        for lemma in present:
+            for mwe in by_anchor.get(lemma, []):
+                if present.issuperset(mwe["lemmas"]):
+                    lookups.append((i, token_lemmas, mwe))
+
+    # (doc, compiled MWE, match) of every candidate match
+    views = [DocView(doc) for doc in docs]
+    candidates: list[tuple[int, dict[str, Any], tuple[int, ...]]] = []
+    for i, token_lemmas, mwe in lookups:
+        compiled = {
+            **mwe,
+            **{
+                f_key: filter_type.compile(mwe[f_key])
+                for f_key, filter_type in FILTER_TYPES.items()
+            },
+        }
+        positions = get_lemma_positions(token_lemmas)
+        for match_idx in find_candidate_matches(mwe["lemmas"], positions):
+            if len(match_idx) > 1:
+                candidates.append((i, compiled, match_idx))
+
+    def run_reference():
+        # Plain Python work per candidate, which scales with the speed of the interpreter on the machine like the benchmarks
+        total = 0
+        for i, mwe, match_idx in candidates:
+            total += len(mwe["lemmas"]) + views[i].pos[match_idx[-1]]
+        return len(candidates)
+
+    def run_find_candidate_matches():
+        for _, token_lemmas, mwe in lookups:
+            find_candidate_matches(mwe["lemmas"], token_lemmas)
+        return len(lookups)
+
+    def run_find_continuous_candidate_matches():
+        for _, token_lemmas, mwe in lookups:
+            find_continuous_candidate_matches(mwe["lemmas"], token_lemmas)
+        return len(lookups)
+
+    def run_filter(f_key: str) -> Callable[[], int]:
+        def run():
+            # A fresh filter per run, so that F5 and F6 start without per-doc state
+            f = FILTER_TYPES[f_key]()
+            for i, mwe, match_idx in candidates:
+                f.filter(mwe[f_key], views[i], match_idx)
+            return len(candidates)
+
+        return run
+
+    benchmarks: dict[str, Callable[[], int]] = {
+        "find_candidate_matches": run_find_candidate_matches,
+        "find_continuous_candidate_matches": run_find_continuous_candidate_matches,
+    }
+    for f_key in FILTER_TYPES:
+        benchmarks[f_key.upper() + ".filter"] = run_filter(f_key)
+
+    recorded: dict[str, Any] = {}
+    if os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            recorded = json.load(f)
+    thresholds: dict[str, float] = {}
+    if recorded.get("config") == config:
+        thresholds = {
+            name: relative * recorded["tolerance"]
+            for name, relative in recorded["relative"].items()
+        }
+    elif args.check:
+        print("Thresholds were recorded for another configuration, not checking.")
+
+    results: dict[str, dict[str, Any]] = {}
+    regressions: list[str] = []
+    print(
+        f"{'benchmark':<36} {'calls':>8} {'us/call':>10} {'relative':>10}"
+        f" {'threshold':>10}"
+    )
+    for name, run in benchmarks.items():
+        result = _time(run, run_reference, args.repeat)
+        threshold = thresholds.get(name)
+        result["threshold_relative"] = threshold
+        result["regression"] = threshold is not None and result["relative"] > threshold
+        if result["regression"]:
+            regressions.append(name)
+        results[name] = result
+        print(
+            f"{name:<36} {result['calls']:>8} {result['us_per_call']:>10.2f}"
+            f" {result['relative']:>10.1f}"
+            f" {f'{threshold:.1f}' if threshold is not None else '-':>10}"
+            + ("  REGRESSION" if result["regression"] else "")
+        )
+
+    # Default costs of the filters, against their times in this run on the machine the defaults were measured on.
+    # They were measured in the configuration of the thresholds, relative times differ in others.
+    drifted: dict[str, dict[str, float]] = {}
+    for f_key, (default_cost, _) in DEFAULT_FILTER_STATS.items() if thresholds else ():
+        measured = (
+            results[f_key.upper() + ".filter"]["relative"] * BENCHMARK_REFERENCE_US
+        )
+        if not default_cost / TOLERANCE <= measured <= default_cost * TOLERANCE:
+            drifted[f_key] = {"default": default_cost, "measured": round(measured, 2)}
+    for f_key, costs in drifted.items():
+        print(
+            f"Default cost of {f_key.upper()} in mwe_detector/plans.py is"
+            f" {costs['default']} us, this run measured {costs['measured']} us."
+        )
+
+    if args.record:
+        with open(args.thresholds, "w") as f:
+            json.dump(
+                {
+                    "config": config,
+                    "tolerance": TOLERANCE,
+                    "relative": {
+                        name: round(result["relative"], 2)
+                        for name, result in results.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "config": vars(args),
+                    "results": results,
+                    "regressions": regressions,
+                    "drifted_default_costs": drifted,
+                },
+                f,
+                indent=2,
+            )
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measures how MWE detection with nlp.pipe(n_process=N) scales with the number of processes.
+
+    python benchmarks/bench_multiprocessing.py --n-docs 20000 --max-processes 8
+
+The docs are sent to the workers as bytes and sent back annotated, so the speedup also includes spaCy's serialization overhead.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import spacy
+from spacy.lang.fr import French
+from spacy.language import Language
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_doc, make_lexicon, make_vocabulary  # noqa: E402
+
+from mwe_detector.model import MWEDetector  # noqa: E402
+
+
+@French.factory("mwe_detector_benchmark")  # type: ignore
+def create_benchmark_detector(nlp: Language, name: str, path: str):
+    return MWEDetector(nlp).from_disk(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-docs", type=int, default=20000)
+    parser.add_argument("--doc-length", type=int, default=30)
+    parser.add_argument("--lexicon-size", type=int, default=20000)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--output", type=str, help="Writes the results as JSON.")
+    args = parser.parse_args()
+
+    vocabulary = make_vocabulary()
+    nlp = spacy.blank("fr")
+    docs = [
+        make_doc(nlp.vocab, args.doc_length, vocabulary, seed=i)
+        for i in range(args.n_docs)
+    ]
+
+    with tempfile.TemporaryDirectory() as path:
+        with open(os.path.join(path, "fr_data.json"), "w") as f:
+            json.dump(make_lexicon(args.lexicon_size, vocabulary), f)
+        nlp.add_pipe("mwe_detector_benchmark", config={"path": path})
+
+        results = []
+        for n_process in range(1, args.max_processes + 1):
+            start = time.perf_counter()
+            for _ in nlp.pipe(docs, n_process=n_process, batch_size=args.batch_size):
+                pass
+            seconds = time.perf_counter() - start
+            results.append({"n_process": n_process, "seconds": seconds})
+
+    baseline = results[0]["seconds"]
+    print(f"{'processes':>9} {'docs/s':>10} {'speedup':>8} {'efficiency':>10}")
+    for result in results:
+        result["docs_per_second"] = args.n_docs / result["seconds"]
+        result["speedup"] = baseline / result["seconds"]
+        print(
+            f"{result['n_process']:>9} {result['docs_per_second']:>10.0f}"
+            f" {result['speedup']:>8.2f} {result['speedup'] / result['n_process']:>10.0%}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
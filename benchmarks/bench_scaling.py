@@ -0,0 +1,192 @@
+"""Measures how MWEDetector.__call__ scales with lexicon size and document length.
+
+    python benchmarks/bench_scaling.py --output scaling.json
+
+For every lexicon size, a synthetic lexicon is generated and loaded in a fresh process, then docs of every length are annotated one by one. Each cell of the grid reports throughput, latency percentiles per doc and the peak RSS of the process so far (doc lengths run in ascending order). The scaling curves are the latencies along each axis; the exponent of a power law fitted to latency over lexicon size tells whether detection scales sublinearly (< 1) in the size of the lexicon.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from typing import Any
+
+import spacy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_doc, make_lexicon, make_vocabulary  # noqa: E402
+
+from mwe_detector.model import MWEDetector  # noqa: E402
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _fit_exponent(xs: list[float], ys: list[float]) -> float:
+    """Exponent b of the least squares fit of y = a * x^b."""
+    log_x = [math.log(x) for x in xs]
+    log_y = [math.log(y) for y in ys]
+    mean_x, mean_y = sum(log_x) / len(log_x), sum(log_y) / len(log_y)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(log_x, log_y))
+    variance = sum((x - mean_x) ** 2 for x in log_x)
+    return covariance / variance if variance else float("nan")
+
+
+def measure_lexicon_size(lexicon_size: int, args: dict[str, Any]) -> list[dict]:
+    """Runs the row of the grid of one lexicon size, meant to be run in a fresh process."""
+    vocabulary = make_vocabulary()
+    nlp = spacy.blank("fr")
+    detector = MWEDetector(nlp)
+    detector._data.from_dict(make_lexicon(lexicon_size, vocabulary, seed=0))
+    start = time.perf_counter()
+    detector._data.compile()
+    compile_seconds = time.perf_counter() - start
+
+    cells = []
+    for doc_length in args["doc_lengths"]:
+        n_docs = max(args["min_docs"], args["tokens_per_cell"] // doc_length)
+        docs = [
+            make_doc(nlp.vocab, doc_length, vocabulary, seed=i) for i in range(n_docs)
+        ]
+        # Warm-up, e.g. for the lemma id lookups of the vocabulary
+        detector(docs[0])
+        latencies = []
+        for doc in docs:
+            start = time.perf_counter()
+            detector(doc)
+            latencies.append(time.perf_counter() - start)
+        total = sum(latencies)
+        latencies.sort()
+        cells.append(
+            {
+                "lexicon_size": lexicon_size,
+                "doc_length": doc_length,
+                "n_docs": n_docs,
+                "compile_seconds": compile_seconds,
+                "docs_per_second": n_docs / total,
+                "tokens_per_second": n_docs * doc_length / total,
+                "latency_ms": {
+                    "mean": total / n_docs * 1e3,
+                    "p50": _percentile(latencies, 0.5) * 1e3,
+                    "p90": _percentile(latencies, 0.9) * 1e3,
+                    "p99": _percentile(latencies, 0.99) * 1e3,
+                },
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+        )
+    return cells
+
+
+def _print_curve(title: str, rows: list, columns: list, value) -> None:
+    print(f"\n{title}")
+    print(f"{'':>12}" + "".join(f"{column:>12}" for column in columns))
+    for row in rows:
+        print(
+            f"{row:>12}" + "".join(f"{value(row, column):>12.3f}" for column in columns)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--lexicon-sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 5000, 20000, 50000, 200000],
+    )
+    parser.add_argument(
+        "--doc-lengths", type=int, nargs="+", default=[10, 100, 1000, 10000]
+    )
+    parser.add_argument(
+        "--tokens-per-cell",
+        type=int,
+        default=20000,
+        help="Tokens annotated per cell, i.e. the number of docs shrinks with their length.",
+    )
+    parser.add_argument("--min-docs", type=int, default=5)
+    parser.add_argument("--output", type=str, help="Writes the results as JSON.")
+    args = parser.parse_args()
+    args.doc_lengths = sorted(args.doc_lengths)
+    args.lexicon_sizes = sorted(args.lexicon_sizes)
+
+    # A fresh process per lexicon size, so that peak RSS isn't carried over
+    context = multiprocessing.get_context("spawn")
+    cells: list[dict] = []
+    for lexicon_size in args.lexicon_sizes:
+        with context.Pool(1) as pool:
+            cells += pool.apply(measure_lexicon_size, (lexicon_size, vars(args)))
+
+    grid = {(cell["lexicon_size"], cell["doc_length"]): cell for cell in cells}
+    _print_curve(
+        "Mean latency per doc (ms), lexicon size x doc length",
+        args.lexicon_sizes,
+        args.doc_lengths,
+        lambda row, column: grid[row, column]["latency_ms"]["mean"],
+    )
+    _print_curve(
+        "p99 latency per doc (ms)",
+        args.lexicon_sizes,
+        args.doc_lengths,
+        lambda row, column: grid[row, column]["latency_ms"]["p99"],
+    )
+    _print_curve(
+        "Throughput (1000 tokens/s)",
+        args.lexicon_sizes,
+        args.doc_lengths,
+        lambda row, column: grid[row, column]["tokens_per_second"] / 1000,
+    )
+    _print_curve(
+        "Peak RSS (MB)",
+        args.lexicon_sizes,
+        args.doc_lengths,
+        lambda row, column: grid[row, column]["peak_rss_mb"],
+    )
+
+    exponents: dict[str, dict[int, float]] = {"lexicon_size": {}, "doc_length": {}}
+    if len(args.lexicon_sizes) > 1:
+        for doc_length in args.doc_lengths:
+            exponents["lexicon_size"][doc_length] = _fit_exponent(
+                args.lexicon_sizes,
+                [
+                    grid[size, doc_length]["latency_ms"]["mean"]
+                    for size in args.lexicon_sizes
+                ],
+            )
+    if len(args.doc_lengths) > 1:
+        for lexicon_size in args.lexicon_sizes:
+            exponents["doc_length"][lexicon_size] = _fit_exponent(
+                args.doc_lengths,
+                [
+                    grid[lexicon_size, length]["latency_ms"]["mean"]
+                    for length in args.doc_lengths
+                ],
+            )
+    print("\nScaling exponents of the mean latency (1 = linear)")
+    for doc_length, exponent in exponents["lexicon_size"].items():
+        print(f"  over lexicon size, docs of {doc_length} tokens: {exponent:.2f}")
+    for lexicon_size, exponent in exponents["doc_length"].items():
+        print(f"  over doc length, lexicon of {lexicon_size} MWEs: {exponent:.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"config": vars(args), "cells": cells, "exponents": exponents},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
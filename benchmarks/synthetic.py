@@ -0,0 +1,139 @@
+"""Synthetic lexicons and docs for the benchmarks.
+
+Everything is generated from a seed and built without a trained spaCy model, so the benchmarks run offline.
+"""
+
+import random
+from itertools import accumulate
+from typing import Optional
+
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+from mwe_detector.model import MWEDetectorDataSerialized, MWEType
+
+POS = ["NOUN", "VERB", "ADJ", "ADP", "DET", "ADV", "PRON", "PROPN"]
+NUMBERS = ["Sing", "Plur"]
+# Share of tokens drawn from the few most frequent lemmas, like "de", "le" or "avoir"
+FUNCTION_WORD_SHARE = 0.3
+N_FUNCTION_WORDS = 10
+
+
+def make_vocabulary(size: int = 20000) -> list[str]:
+    """Lemmas ordered by frequency rank, the first `N_FUNCTION_WORDS` act as function words."""
+    return [f"lemma{i}" for i in range(size)]
+
+
+def _zipf_weights(size: int) -> list[float]:
+    weights = [1.0 / rank for rank in range(1, size + 1)]
+    return list(accumulate(weights))
+
+
+def sample_lemma(
+    rng: random.Random,
+    vocabulary: list[str],
+    function_word_share: float = FUNCTION_WORD_SHARE,
+    zipfian: bool = True,
+) -> str:
+    if rng.random() < function_word_share:
+        return vocabulary[rng.randrange(N_FUNCTION_WORDS)]
+    content = vocabulary[N_FUNCTION_WORDS:]
+    if not zipfian:
+        return rng.choice(content)
+    if len(_cum_weights) != len(content):
+        _cum_weights[:] = _zipf_weights(len(content))
+    return rng.choices(content, cum_weights=_cum_weights)[0]
+
+
+_cum_weights: list[float] = []
+
+
+def make_mwe(rng: random.Random, lemmas: list[str]) -> MWEType:
+    size = len(lemmas)
+    pos = rng.choice(POS)
+
+    def pos_sequence(length: int) -> list[str]:
+        return [rng.choice(POS) for _ in range(length)]
+
+    return {
+        "pos": pos,
+        # Rarest lemma first, as in training with a rank dictionary
+        "lemmas": sorted(lemmas, key=lambda lemma: -int(lemma[5:])),
+        "f1": [sorted(pos_sequence(size)) for _ in range(rng.randrange(1, 10))],
+        "f2": [pos_sequence(size) for _ in range(rng.randrange(1, 20))],
+        "f3": [
+            pos_sequence(size + rng.randrange(3)) for _ in range(rng.randrange(1, 30))
+        ],
+        "f4": rng.sample([1, 2, 3, 4, 5, 8], rng.randrange(1, 4)),
+        "f5": None,
+        "f6": None,
+        "f7": rng.sample(NUMBERS, rng.randrange(3)),
+        "f8": None,
+    }
+
+
+def make_lexicon(
+    n_entries: int,
+    vocabulary: list[str],
+    seed: int = 0,
+    active_filters: Optional[list[str]] = None,
+) -> MWEDetectorDataSerialized:
+    """A lexicon of `n_entries` MWEs of two to four lemmas, in the shape of `MWEDetectorData.to_dict`."""
+    rng = random.Random(seed)
+    mwes: dict[str, MWEType] = {}
+    while len(mwes) < n_entries:
+        # Every MWE holds at least one content lemma, the others may be function words.
+        # Content lemmas are spread evenly over the lexicon, while docs are Zipfian.
+        lemmas = [sample_lemma(rng, vocabulary, function_word_share=0.0, zipfian=False)]
+        lemmas += [
+            sample_lemma(rng, vocabulary, zipfian=False)
+            for _ in range(rng.choice([1, 1, 2, 3]))
+        ]
+        mwe = make_mwe(rng, lemmas)
+        mwes[" ".join(lemmas) + ":" + mwe["pos"]] = mwe
+    filters = active_filters if active_filters is not None else ["f2", "f4", "f5"]
+    return {"mwes": mwes, "active_filters": {pos: list(filters) for pos in POS}}
+
+
+def make_doc(
+    vocab: Vocab,
+    n_tokens: int,
+    vocabulary: list[str],
+    seed: int = 0,
+    function_word_share: float = FUNCTION_WORD_SHARE,
+    max_depth: int = 4,
+) -> Doc:
+    """A single sentence of `n_tokens` tokens with lemmas, POS tags, number morphology and a dependency tree.
+    Heads are picked so that no token is more than `max_depth` arcs away from the root.
+    """
+    rng = random.Random(seed)
+    lemmas = [
+        sample_lemma(rng, vocabulary, function_word_share) for _ in range(n_tokens)
+    ]
+    pos = [rng.choice(POS) for _ in range(n_tokens)]
+    morphs = ["Number=" + rng.choice(NUMBERS) if tag == "NOUN" else "" for tag in pos]
+
+    root = rng.randrange(n_tokens)
+    depth = [0] * n_tokens
+    heads = [root] * n_tokens
+    attached = [root]
+    for i in rng.sample(range(n_tokens), n_tokens):
+        if i == root:
+            continue
+        head = rng.choice(attached)
+        while depth[head] >= max_depth:
+            head = heads[head]
+        heads[i] = head
+        depth[i] = depth[head] + 1
+        attached.append(i)
+    deps = ["ROOT" if i == root else "dep" for i in range(n_tokens)]
+
+    return Doc(
+        vocab,
+        words=lemmas,
+        lemmas=lemmas,
+        pos=pos,
+        heads=heads,
+        deps=deps,
+        morphs=morphs,
+    )
@@ -1,4 +1,6 @@
 TRAIN_DATA_DIR = "./data/"
+# Converted training corpora, see `load_cupt_to_spacy.iter_cached_cupt_to_spacy`
+CORPUS_CACHE_DIR = "./data/cache/"
 
 TEST_DATA_PATH = {
     "fr": "./data",
@@ -1,44 +1,105 @@
-from typing import List
+import hashlib
+import os
+import shutil
+from typing import Iterator, List
 
 import conllu
 from spacy.language import Language
-from spacy.tokens import Doc
+from spacy.tokens import Doc, DocBin
 
+# Number of docs per DocBin file of a cached corpus
+CACHE_SHARD_SIZE = 10000
 
-def load_cupt_to_spacy(path: str, nlp: Language, mwe_column_name: str = "wikt:mwe"):
+
+def iter_cupt_to_spacy(
+    path: str, nlp: Language, mwe_column_name: str = "wikt:mwe"
+) -> Iterator[Doc]:
+    """Yields the sentences of a .cupt file as docs, one at a time. The file is parsed sentence by sentence, so memory does not grow with its size."""
     with open(path, "r", encoding="utf-8") as f:
-        data = f.read()
-
-    # Parse the CoNLL-U data using the conllu package
-    parsed_data = conllu.parse(data)
-
-    docs: List[Doc] = []
-    for cupt_sent in parsed_data:
-        cupt_sent = [tok for tok in cupt_sent if "-" not in str(tok["id"])]
-        words = [token["form"] for token in cupt_sent]
-        spaces = [True if token["misc"] == None else False for token in cupt_sent]
-        lemmas = [token["lemma"] for token in cupt_sent]
-        pos = [token["upostag"] for token in cupt_sent]
-        head = [
-            token["head"] - 1 if token["head"] != 0 else i
-            for i, token in enumerate(cupt_sent)
-        ]
-        dep = [token["deprel"] for token in cupt_sent]
-        morph = [token["feats"] for token in cupt_sent]
-        wikt_mwe = [token[mwe_column_name] for token in cupt_sent]
-        doc = Doc(
-            nlp.vocab,
-            words=words,
-            spaces=spaces,
-            lemmas=lemmas,
-            pos=pos,
-            heads=head,
-            deps=dep,
-        )
-
-        for i in range(len(doc)):
-            doc[i]._.__setattr__(mwe_column_name.replace(":", "_"), wikt_mwe[i])
-            doc[i].set_morph(morph[i])  # type: ignore
-        docs.append(doc)
+        for cupt_sent in conllu.parse_incr(f):
+            yield _cupt_sentence_to_doc(cupt_sent, nlp, mwe_column_name)
+
+
+def cupt_cache_key(path: str, mwe_column_name: str = "wikt:mwe") -> str:
+    """Hash of the content of the .cupt file and of the MWE column name."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(mwe_column_name.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def iter_cached_cupt_to_spacy(
+    path: str, nlp: Language, cache_dir: str, mwe_column_name: str = "wikt:mwe"
+) -> Iterator[Doc]:
+    """Like `iter_cupt_to_spacy`, but keeps the converted docs in `cache_dir`, keyed by `cupt_cache_key`.
+    The first pass over a file writes its docs as DocBin files of `CACHE_SHARD_SIZE` docs and marks the cache as complete once all docs have been yielded. Later calls read the DocBins instead of converting the file again. An incomplete cache, e.g. of a pass that was stopped early, is rebuilt.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(
+        cache_dir, stem + "-" + cupt_cache_key(path, mwe_column_name)[:16]
+    )
+    complete_path = os.path.join(cache_path, "complete")
+    if os.path.exists(complete_path):
+        for name in sorted(os.listdir(cache_path)):
+            if name.endswith(".spacy"):
+                doc_bin = DocBin().from_disk(os.path.join(cache_path, name))
+                yield from doc_bin.get_docs(nlp.vocab)
+        return
+
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.makedirs(cache_path)
+    n_shards = 0
+    doc_bin = DocBin(store_user_data=True)
 
+    def write_shard():
+        nonlocal n_shards, doc_bin
+        doc_bin.to_disk(os.path.join(cache_path, f"{n_shards:06d}.spacy"))
+        n_shards += 1
+        doc_bin = DocBin(store_user_data=True)
+
+    for doc in iter_cupt_to_spacy(path, nlp, mwe_column_name):
+        doc_bin.add(doc)
+        yield doc
+        if len(doc_bin) == CACHE_SHARD_SIZE:
+            write_shard()
+    if len(doc_bin):
+        write_shard()
+    open(complete_path, "w").close()
+
+
+def load_cupt_to_spacy(path: str, nlp: Language, mwe_column_name: str = "wikt:mwe"):
+    docs: List[Doc] = list(iter_cupt_to_spacy(path, nlp, mwe_column_name))
     return docs
+
+
+def _cupt_sentence_to_doc(
+    cupt_sent: conllu.TokenList, nlp: Language, mwe_column_name: str
+) -> Doc:
+    cupt_sent = [tok for tok in cupt_sent if "-" not in str(tok["id"])]
+    words = [token["form"] for token in cupt_sent]
+    spaces = [True if token["misc"] == None else False for token in cupt_sent]
+    lemmas = [token["lemma"] for token in cupt_sent]
+    pos = [token["upostag"] for token in cupt_sent]
+    head = [
+        token["head"] - 1 if token["head"] != 0 else i
+        for i, token in enumerate(cupt_sent)
+    ]
+    dep = [token["deprel"] for token in cupt_sent]
+    morph = [token["feats"] for token in cupt_sent]
+    wikt_mwe = [token[mwe_column_name] for token in cupt_sent]
+    doc = Doc(
+        nlp.vocab,
+        words=words,
+        spaces=spaces,
+        lemmas=lemmas,
+        pos=pos,
+        heads=head,
+        deps=dep,
+    )
+
+    for i in range(len(doc)):
+        doc[i]._.__setattr__(mwe_column_name.replace(":", "_"), wikt_mwe[i])
+        doc[i].set_morph(morph[i])  # type: ignore
+    return doc
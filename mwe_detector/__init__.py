@@ -1,6 +1,9 @@
 from . import lemma_normalizer as lemma_normalizer
 from .model import MWEDetector as MWEDetector
+from .model import clear_cache as clear_cache
 from .utils import find_candidate_matches as find_candidate_matches
 from .utils import (
     find_continuous_candidate_matches as find_continuous_candidate_matches,
 )
+from .utils import get_lemma_positions as get_lemma_positions
+from .utils import iter_candidate_matches as iter_candidate_matches
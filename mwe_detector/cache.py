@@ -0,0 +1,103 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+FileSignature = tuple[tuple[str, int, int], ...]
+
+
+def file_signature(paths: Iterable[str]) -> FileSignature:
+    """Modification time and size of each existing file in `paths`, missing files are left out."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class FileCache(Generic[T]):
+    """Process-wide cache of values loaded from files.
+    A value is reloaded when the modification time or size of one of its files has changed since it was loaded. Loading is serialized, so that concurrent pipelines built from the same files only load them once.
+    """
+
+    def __init__(self):
+        self._values: dict[Hashable, tuple[FileSignature, T]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, paths: Iterable[str], load: Callable[[], T]) -> T:
+        paths = list(paths)
+        with self._lock:
+            signature = file_signature(paths)
+            cached = self._values.get(key)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            value = load()
+            self._values[key] = (signature, value)
+            return value
+
+    def clear(self, match: Optional[Callable[[Hashable], bool]] = None):
+        """Drops all values, or only those whose key satisfies `match`."""
+        with self._lock:
+            if match is None:
+                self._values.clear()
+                return
+            for key in [key for key in self._values if match(key)]:
+                del self._values[key]
+
+    def __len__(self):
+        return len(self._values)
+
+
+class LRUCache(Generic[T]):
+    """Mapping of at most `maxsize` values, which evicts the least recently used value when full.
+    Counts hits, misses and evictions, see `stats`. A `maxsize` of 0 caches nothing.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._values: OrderedDict[Hashable, T] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """The value of `key`, None on a miss."""
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._values.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: T):
+        if self.maxsize <= 0:
+            return
+        self._values[key] = value
+        self._values.move_to_end(key)
+        if len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drops all values, the counts are kept."""
+        self._values.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._values),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._values)
@@ -3,11 +3,41 @@
 from abc import ABC, abstractmethod
 
 # Utilities
-from itertools import product
-from typing import Generic, Tuple, TypeAlias, TypedDict, TypeVar
-
-import numpy as np
-from spacy.tokens import Doc, Token
+from collections import defaultdict
+from itertools import combinations
+from typing import (
+    Any,
+    Generic,
+    Hashable,
+    Iterable,
+    Optional,
+    Tuple,
+    TypeAlias,
+    TypedDict,
+    TypeVar,
+    Union,
+)
+
+from spacy.attrs import HEAD
+from spacy.tokens import Doc
+
+from .utils import LemmaPositions
+from .view import NOUN, DocView, as_view, pos_id
+
+# POS patterns compiled to `view.pos_id`s, shared by the MWEs compiled together (see `Filter.compile`)
+PatternIds: TypeAlias = dict[tuple[str, ...], tuple[int, ...]]
+
+
+def _pattern_ids(
+    pattern: Iterable[str], patterns: Optional[PatternIds]
+) -> tuple[int, ...]:
+    key = tuple(pattern)
+    if patterns is None:
+        return tuple(pos_id(pos) for pos in key)
+    ids = patterns.get(key)
+    if ids is None:
+        ids = patterns[key] = tuple(pos_id(pos) for pos in key)
+    return ids
 
 
 class ExampleType(TypedDict):
@@ -21,6 +51,41 @@ class ExampleType(TypedDict):
 T = TypeVar("T")
 
 
+def _hashable(item: Any) -> Hashable:
+    return tuple(item) if isinstance(item, list) else item
+
+
+class UniqueList(list):
+    """List of training observations with a hashed membership test, so that `add_example` deduplicates in constant time.
+    Items are POS sequences (lists), gaps or inflections. Only `append`, `extend` and `add` keep the index up to date. It is a list for all other purposes and is turned into a plain list by `MWEDetectorData.to_dict`.
+    """
+
+    def __init__(self, items: Iterable[Any] = ()):
+        super().__init__()
+        self._index: set[Hashable] = set()
+        self.extend(items)
+
+    def append(self, item: Any):
+        super().append(item)
+        self._index.add(_hashable(item))
+
+    def extend(self, items: Iterable[Any]):
+        for item in items:
+            self.append(item)
+
+    def add(self, item: Any):
+        """Appends `item` unless it is already held, like `set.add`."""
+        if item not in self:
+            self.append(item)
+
+    def __contains__(self, item: Any) -> bool:
+        return _hashable(item) in self._index
+
+    def __reduce__(self):
+        # Rebuilds the index, instead of appending the items to an instance without one
+        return (type(self), (list(self),))
+
+
 class Filter(ABC, Generic[T]):
     @staticmethod
     @abstractmethod
@@ -28,15 +93,40 @@ class Filter(ABC, Generic[T]):
         raise NotImplementedError
 
     @abstractmethod
-    def filter(self, data: T, sent: Doc, match_idx: Tuple[int, ...]) -> bool:
+    def filter(
+        self, data: T, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]
+    ) -> bool:
         raise NotImplementedError
 
     @abstractmethod
     def add_example(self, data: T, mwe: ExampleType) -> None:
         raise NotImplementedError
 
+    def signature(
+        self, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]
+    ) -> Optional[Hashable]:
+        """The features of the candidate match that `filter` depends on besides the training data, so that its decisions can be cached by them. None if the decision depends on the rest of the doc, which is the default."""
+        return None
+
+    @staticmethod
+    @abstractmethod
+    def merge(data: T, other: T) -> None:
+        """Adds the training data `other` to `data`. Merging the data trained on two corpora gives the data trained on both corpora in turn."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Drops the state the filter keeps about the doc it filtered last, see `F5` and `F6`. `MWEDetector` calls it after every batch, so that filters don't keep docs alive."""
+
+    @staticmethod
+    def compile(data: T, patterns: Optional[PatternIds] = None) -> Any:
+        """Turns the training data into the structure `filter` looks candidates up in, with POS tags as `view.pos_id`s. `filter` accepts both forms.
+        POS patterns are compiled once and looked up in `patterns` if given, many MWEs of a lexicon share their patterns.
+        """
+        return data
+
 
 F1Data: TypeAlias = list[list[str]]
+F1Compiled: TypeAlias = dict[int, frozenset[tuple[int, ...]]]
 
 
 class F1(Filter[F1Data]):
@@ -53,21 +143,50 @@ class F1(Filter[F1Data]):
         if pos_multiset not in data:
             data.append(pos_multiset)
 
-    def filter(self, data: F1Data, sent: Doc, match_idx: Tuple[int, ...]):
-        match_pos = self._get_multiset(sent, match_idx)
-        return any(
-            [
-                all(match_pos.count(pos) >= pos_set.count(pos) for pos in set(pos_set))
-                for pos_set in data
-            ]
-        )
+    def filter(
+        self,
+        data: Union[F1Data, F1Compiled],
+        sent: Union[Doc, DocView],
+        match_idx: Tuple[int, ...],
+    ):
+        if isinstance(data, list):
+            data = self.compile(data)
+        pos = as_view(sent).pos
+        match_pos = tuple(sorted([pos[i] for i in match_idx]))
+        # Accept if any observed multiset is a sub-multiset of the match's multiset
+        for size, pos_sets in data.items():
+            if size == len(match_pos):
+                if match_pos in pos_sets:
+                    return True
+            elif size < len(match_pos):
+                if any(sub in pos_sets for sub in combinations(match_pos, size)):
+                    return True
+        return False
+
+    def signature(self, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]):
+        pos = as_view(sent).pos
+        return tuple(sorted([pos[i] for i in match_idx]))
+
+    @staticmethod
+    def compile(data: F1Data, patterns: Optional[PatternIds] = None) -> F1Compiled:
+        by_size: defaultdict[int, set[tuple[int, ...]]] = defaultdict(set)
+        for pos_set in data:
+            by_size[len(pos_set)].add(tuple(sorted(_pattern_ids(pos_set, patterns))))
+        return {size: frozenset(pos_sets) for size, pos_sets in by_size.items()}
+
+    @staticmethod
+    def merge(data: F1Data, other: F1Data):
+        for pos_multiset in other:
+            if pos_multiset not in data:
+                data.append(pos_multiset)
 
     @staticmethod
     def default_data() -> F1Data:
-        return []
+        return UniqueList([])
 
 
 F2Data: TypeAlias = list[list[str]]
+F2Compiled: TypeAlias = frozenset[tuple[int, ...]]
 
 
 class F2(Filter[F2Data]):
@@ -84,16 +203,38 @@ class F2(Filter[F2Data]):
         if pos_order not in data:
             data.append(pos_order)
 
-    def filter(self, data: F2Data, sent: Doc, match_idx: Tuple[int, ...]):
-        match_pos = self._get_pos(sent, match_idx)
-        return any([match_pos == pos_order for pos_order in data])
+    def filter(
+        self,
+        data: Union[F2Data, F2Compiled],
+        sent: Union[Doc, DocView],
+        match_idx: Tuple[int, ...],
+    ):
+        if isinstance(data, list):
+            data = self.compile(data)
+        pos = as_view(sent).pos
+        return tuple([pos[i] for i in match_idx]) in data
+
+    def signature(self, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]):
+        pos = as_view(sent).pos
+        return tuple([pos[i] for i in match_idx])
+
+    @staticmethod
+    def compile(data: F2Data, patterns: Optional[PatternIds] = None) -> F2Compiled:
+        return frozenset(_pattern_ids(pos_order, patterns) for pos_order in data)
+
+    @staticmethod
+    def merge(data: F2Data, other: F2Data):
+        for pos_order in other:
+            if pos_order not in data:
+                data.append(pos_order)
 
     @staticmethod
     def default_data() -> F2Data:
-        return []
+        return UniqueList([])
 
 
 F3Data: TypeAlias = list[list[str]]
+F3Compiled: TypeAlias = frozenset[tuple[int, ...]]
 
 
 class F3(Filter[F3Data]):
@@ -110,13 +251,34 @@ class F3(Filter[F3Data]):
         if pos_order not in data:
             data.append(pos_order)
 
-    def filter(self, data: F3Data, sent: Doc, match_idx: Tuple[int, ...]):
-        match_pos = self._get_pos(sent, match_idx)
-        return any([match_pos == pos_order for pos_order in data])
+    def filter(
+        self,
+        data: Union[F3Data, F3Compiled],
+        sent: Union[Doc, DocView],
+        match_idx: Tuple[int, ...],
+    ):
+        if isinstance(data, list):
+            data = self.compile(data)
+        pos = as_view(sent).pos
+        return tuple(pos[min(match_idx) : max(match_idx) + 1]) in data
+
+    def signature(self, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]):
+        pos = as_view(sent).pos
+        return tuple(pos[min(match_idx) : max(match_idx) + 1])
+
+    @staticmethod
+    def compile(data: F3Data, patterns: Optional[PatternIds] = None) -> F3Compiled:
+        return frozenset(_pattern_ids(pos_order, patterns) for pos_order in data)
+
+    @staticmethod
+    def merge(data: F3Data, other: F3Data):
+        for pos_order in other:
+            if pos_order not in data:
+                data.append(pos_order)
 
     @staticmethod
     def default_data() -> F3Data:
-        return []
+        return UniqueList([])
 
 
 F4Data: TypeAlias = list[int]
@@ -141,13 +303,31 @@ class F4(Filter[F4Data]):
         if discontinuity not in data:
             data.append(discontinuity)
 
-    def filter(self, data: F4Data, sent: Doc, match_idx: Tuple[int, ...]):
+    def filter(
+        self, data: F4Data, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]
+    ):
         match_discontinuity = self._get_discontinuity(match_idx)
         return match_discontinuity <= (max(data) if data else 1)
 
+    def signature(self, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]):
+        return self._get_discontinuity(match_idx)
+
+    @staticmethod
+    def merge(data: F4Data, other: F4Data):
+        for discontinuity in other:
+            if discontinuity not in data:
+                data.append(discontinuity)
+
     @staticmethod
     def default_data() -> F4Data:
-        return [1]
+        return UniqueList([1])
+
+
+def _fingerprint(doc: Union[Doc, DocView]) -> tuple[int, Hashable]:
+    """Length and head array of `doc`, which tell a doc apart from itself before it was modified in place. A view is never modified, a view of the modified doc has a new head list."""
+    if isinstance(doc, DocView):
+        return len(doc), id(doc.heads)
+    return len(doc), doc.to_array(HEAD).tobytes()
 
 
 F5Data: TypeAlias = None
@@ -159,35 +339,102 @@ class F5(Filter[F5Data]):
     This filter is global (i.e. works in the same way for all MWEs). It lets a candidate match pass only if this match has the smallest discontinuity for all other matches of the given multiset of lemmata in the given sentence.
     """
 
-    def _get_discontinuity(self, doc: Doc, match_idx: Tuple[int, ...]):
+    def _get_discontinuity(self, match_idx: Tuple[int, ...]):
         idx = list(match_idx)
         idx.sort()
         return max([idx[i + 1] - idx[i] for i in range(len(idx) - 1)])
 
-    def _get_all_internal_matches(self, doc: Doc, match_idx: Tuple[int, ...]):
-        lemmas = [doc[i].lemma_ for i in match_idx]
-        single_matches: list[list[int]] = []
-
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        # Per-doc state, reset whenever a different doc is filtered
+        self._doc: Optional[Union[Doc, DocView]] = None
+        self._fingerprint: Optional[tuple[int, Hashable]] = None
+        self._lemmas: list[int] = []
+        self._lemma_positions: LemmaPositions = {}
+        self._min_discontinuities: dict[tuple[int, ...], int] = {}
+
+    def __getstate__(self):
+        # Drop the per-doc state when pickled
+        return type(self)().__dict__
+
+    def _set_doc(self, doc: Union[Doc, DocView]):
+        fingerprint = _fingerprint(doc)
+        if doc is self._doc and fingerprint == self._fingerprint:
+            return
+        self._doc = doc
+        self._fingerprint = fingerprint
+        view = as_view(doc)
+        self._lemmas = view.lemmas
+        self._lemma_positions = view.lemma_positions
+        self._min_discontinuities = {}
+
+    def _has_match_within(
+        self, occurrences: list[tuple[int, int]], caps: tuple[int, ...], gap: int
+    ) -> bool:
+        """Checks whether every lemma j can be picked between 1 and `caps[j]` times from `occurrences` (sorted (position, lemma) pairs), such that neighbouring picks are at most `gap` apart.
+        Sweeps over the occurrences, keeping for every vector of pick counts the last position at which a valid chain of picks with these counts ends.
+        """
+        n_lemmas = len(caps)
+        last_end: dict[tuple[int, ...], int] = {}
+        for position, j in occurrences:
+            extended = [tuple(1 if k == j else 0 for k in range(n_lemmas))] + [
+                counts[:j] + (counts[j] + 1,) + counts[j + 1 :]
+                for counts, end in last_end.items()
+                if end >= position - gap and counts[j] < caps[j]
+            ]
+            for counts in extended:
+                if all(counts):
+                    return True
+                last_end[counts] = position
+        return False
+
+    def _get_min_discontinuity(self, lemmas: tuple[int, ...]) -> int:
+        """Smallest discontinuity of all matches of the (sorted) lemma ids `lemmas` in the current doc. Like in the product of the lemmas' occurrences, a token may stand for several copies of its lemma."""
+        if lemmas in self._min_discontinuities:
+            return self._min_discontinuities[lemmas]
+
+        caps: dict[int, int] = {}
         for lemma in lemmas:
-            single_matches.append(
-                [
-                    tok.i
-                    for tok in list(
-                        filter(lambda x: x.lemma_.lower() == lemma.lower(), doc)
-                    )
-                ]
+            caps[lemma] = caps.get(lemma, 0) + 1
+        if len(caps) == 1:
+            # All copies sit on the same token
+            min_discontinuity = 0
+        else:
+            occurrences = sorted(
+                (position, j)
+                for j, lemma in enumerate(caps)
+                for position in self._lemma_positions[lemma]
             )
-        return list(product(*single_matches))
-
-    def filter(self, data: F5Data, sent: Doc, match_idx: Tuple[int, ...]):
-        all_matches = self._get_all_internal_matches(sent, match_idx)
-        return self._get_discontinuity(sent, match_idx) <= min(
-            [self._get_discontinuity(sent, other_match) for other_match in all_matches]
-        )
+            # Binary search over the largest gap, which is at most the distance between the outermost occurrences
+            low, high = 1, occurrences[-1][0] - occurrences[0][0]
+            while low < high:
+                gap = (low + high) // 2
+                if self._has_match_within(occurrences, tuple(caps.values()), gap):
+                    high = gap
+                else:
+                    low = gap + 1
+            min_discontinuity = low
+
+        self._min_discontinuities[lemmas] = min_discontinuity
+        return min_discontinuity
+
+    def filter(
+        self, data: F5Data, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]
+    ):
+        match_discontinuity = self._get_discontinuity(match_idx)
+        self._set_doc(sent)
+        lemmas = tuple(sorted([self._lemmas[i] for i in match_idx]))
+        return match_discontinuity <= self._get_min_discontinuity(lemmas)
 
     def add_example(self, data: F5Data, mwe: ExampleType):
         return None
 
+    @staticmethod
+    def merge(data: F5Data, other: F5Data):
+        return None
+
     @staticmethod
     def default_data() -> F5Data:
         return None
@@ -202,34 +449,71 @@ class F6(Filter[F6Data]):
     This filter is global. It keeps a candidate match of two tokens if the tokens are parents or grandparents of each other. It keeps candidate matches of more than two tokens if these tokens build a connected subgraph of the dependency tree.
     """
 
-    def _is_connected_tree(self, tokens: list[Token]):
-        # Algorithm has high complexity,
-        # Usable only since number of tokens is not expected to be large
-        N = len(tokens)
-        adjacency = np.zeros((N, N), dtype=int)
-        for i in range(N):
-            for j in range(N):
-                if i == j:
-                    adjacency[i][j] = 1
-                    continue
-                adjacency[i][j] = (
-                    1
-                    if tokens[i].head == tokens[j] or tokens[j].head == tokens[i]
-                    else 0
-                )
-        power = np.linalg.matrix_power(adjacency, N)
-        return any([all(row > 0) for row in power])
-
-    def filter(self, data: F6Data, sent: Doc, match_idx: Tuple[int, ...]):
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        # Per-doc state, reset whenever a different doc is filtered
+        self._doc: Optional[Union[Doc, DocView]] = None
+        self._fingerprint: Optional[tuple[int, Hashable]] = None
+        self._heads: list[int] = []
+
+    def __getstate__(self):
+        # Drop the per-doc state when pickled
+        return type(self)().__dict__
+
+    def _set_doc(self, doc: Union[Doc, DocView]):
+        fingerprint = _fingerprint(doc)
+        if doc is self._doc and fingerprint == self._fingerprint:
+            return
+        self._doc = doc
+        self._fingerprint = fingerprint
+        self._heads = as_view(doc).heads
+
+    def _is_connected_tree(self, match_idx: Tuple[int, ...]):
+        # Union-find over the dependency edges between the candidate tokens
+        parents = {i: i for i in match_idx}
+
+        def find(i: int):
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        components = len(parents)
+        for i in parents:
+            head = self._heads[i]
+            if head == i or head not in parents:
+                continue
+            root_i, root_head = find(i), find(head)
+            if root_i != root_head:
+                parents[root_i] = root_head
+                components -= 1
+        return components == 1
+
+    def filter(
+        self, data: F6Data, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]
+    ):
+        self._set_doc(sent)
+        heads = self._heads
         if len(match_idx) == 2:
-            a, b = sent[match_idx[0]], sent[match_idx[1]]
-            return a.head == b or b.head == a or a.head.head == b or b.head.head == a
+            a, b = match_idx
+            return (
+                heads[a] == b
+                or heads[b] == a
+                or heads[heads[a]] == b
+                or heads[heads[b]] == a
+            )
 
-        return self._is_connected_tree([sent[i] for i in match_idx])
+        return self._is_connected_tree(match_idx)
 
     def add_example(self, data: F6Data, mwe: ExampleType):
         return None
 
+    @staticmethod
+    def merge(data: F6Data, other: F6Data):
+        return None
+
     @staticmethod
     def default_data() -> F6Data:
         return None
@@ -258,17 +542,34 @@ class F7(Filter[F7Data]):
             data.add(noun_number[0])
         return
 
-    def filter(self, data: F7Data, sent: Doc, match_idx: Tuple[int, ...]):
-        nouns = self._get_nouns(sent, match_idx)
+    def filter(
+        self, data: F7Data, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]
+    ):
+        view = as_view(sent)
+        nouns = [i for i in match_idx if view.pos[i] == NOUN]
         if not len(nouns) == 1:
             return True
-        noun_numbers = nouns[0].morph.get("Number", None)
-        if not noun_numbers:
+        noun_number = view.number(nouns[0])
+        if not noun_number:
             return False
-        noun_number = noun_numbers[0]
 
         return noun_number in data
 
+    def signature(self, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]):
+        # Number of the only noun, empty if there are none or several
+        view = as_view(sent)
+        nouns = [i for i in match_idx if view.pos[i] == NOUN]
+        return (view.number(nouns[0]),) if len(nouns) == 1 else ()
+
+    @staticmethod
+    def merge(data: F7Data, other: F7Data):
+        # Data read from disk holds a list
+        for number in other:
+            if isinstance(data, set):
+                data.add(number)
+            elif number not in data:
+                data.append(number)
+
     @staticmethod
     def default_data() -> F7Data:
         return set()
@@ -283,12 +584,18 @@ class F8(Filter[F8Data]):
     This filter is global. It lets a candidate match pass only if this match is not nested in another match of the same multiset of lemmata in the given sentence.
     """
 
-    def filter(self, data: F8Data, sent: Doc, match_idx: Tuple[int, ...]):
+    def filter(
+        self, data: F8Data, sent: Union[Doc, DocView], match_idx: Tuple[int, ...]
+    ):
         return True
 
     def add_example(self, data: F8Data, mwe: ExampleType):
         return None
 
+    @staticmethod
+    def merge(data: F8Data, other: F8Data):
+        return None
+
     @staticmethod
     def default_data() -> F8Data:
         return None
@@ -0,0 +1,167 @@
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Sequence, Union
+
+# Upper bounds of the buckets of the per-doc histograms
+DOC_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# (filter, MWE POS) of the per-filter statistics
+FilterKey = tuple[str, str]
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[int, ...] = DOC_BUCKETS):
+        self.buckets = buckets
+        # The last count is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value: int):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Instrumentation:
+    """Statistics of the filters and of the docs processed by an `MWEDetector`, see `MWEDetector.enable_instrumentation`.
+    Every filter call is recorded by filter and POS of the MWE, with its time and whether it rejected the match. Detection stops applying filters at the first rejection (see `MWEDetector.calibrate`), so the rejection rates of later filters are those among the candidates that passed the earlier ones. Every doc records the number of candidate matches that went through the filters and the number of matches. Statistics are kept per process, e.g. those of `nlp.pipe(n_process=...)` workers stay in the workers.
+    """
+
+    def __init__(self):
+        # [calls, rejections, seconds] by (filter, MWE POS)
+        self.filters: dict[FilterKey, list[Union[int, float]]] = {}
+        self.candidates_per_doc = _Histogram()
+        self.matches_per_doc = _Histogram()
+
+    def reset(self):
+        self.__init__()
+
+    def apply_filters(
+        self,
+        filters: dict[str, Any],
+        f_keys: Sequence[str],
+        doc: Any,
+        mwe: dict[str, Any],
+        match_idx: tuple[int, ...],
+        short_circuit: bool = False,
+    ) -> tuple[bool, ...]:
+        """Same as `MWEDetector.apply_filters`, timing and counting every filter call. With `short_circuit`, stops after the first rejection."""
+        results = []
+        for f_key in f_keys:
+            result = self.call(filters, f_key, doc, mwe, match_idx)
+            results.append(result)
+            if short_circuit and not result:
+                break
+        return tuple(results)
+
+    def call(
+        self,
+        filters: dict[str, Any],
+        f_key: str,
+        doc: Any,
+        mwe: dict[str, Any],
+        match_idx: tuple[int, ...],
+    ) -> bool:
+        """Applies the filter `f_key`, timing and counting the call."""
+        start = time.perf_counter()
+        result = filters[f_key].filter(mwe[f_key], doc, match_idx)
+        elapsed = time.perf_counter() - start
+        stats = self.filters.get((f_key, mwe["pos"]))
+        if stats is None:
+            stats = self.filters[f_key, mwe["pos"]] = [0, 0, 0.0]
+        stats[0] += 1
+        stats[1] += not result
+        stats[2] += elapsed
+        return result
+
+    def passes(
+        self,
+        filters: dict[str, Any],
+        plan: tuple[str, ...],
+        doc: Any,
+        mwe: dict[str, Any],
+        match_idx: tuple[int, ...],
+    ) -> bool:
+        """Same as `MWEDetector._passes`, timing and counting the filter calls up to the first rejection."""
+        return all(self.apply_filters(filters, plan, doc, mwe, match_idx, True))
+
+    def record_doc(self, n_candidates: int, n_matches: int):
+        self.candidates_per_doc.observe(n_candidates)
+        self.matches_per_doc.observe(n_matches)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Copy of the statistics as plain dicts, with the rejection rate of every filter by MWE POS."""
+        filters: dict[str, dict[str, dict[str, Union[int, float]]]] = {}
+        for (f_key, pos), (calls, rejections, seconds) in sorted(self.filters.items()):
+            filters.setdefault(f_key, {})[pos] = {
+                "calls": calls,
+                "rejections": rejections,
+                "rejection_rate": rejections / calls if calls else 0.0,
+                "seconds": seconds,
+            }
+        return {
+            "filters": filters,
+            "docs": self.candidates_per_doc.count,
+            "candidates": self.candidates_per_doc.sum,
+            "matches": self.matches_per_doc.sum,
+            "candidates_per_doc": dict(self.candidates_per_doc.cumulative()),
+            "matches_per_doc": dict(self.matches_per_doc.cumulative()),
+        }
+
+    def to_prometheus(self, prefix: str = "mwe_detector") -> str:
+        """The statistics in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        filter_metrics = [
+            ("filter_calls_total", "Calls of a filter, by MWE POS.", 0),
+            ("filter_rejections_total", "Matches rejected by a filter, by MWE POS.", 1),
+            ("filter_seconds_total", "Time spent in a filter, by MWE POS.", 2),
+        ]
+        for name, help_text, column in filter_metrics:
+            metric(name, "counter", help_text)
+            for (f_key, pos), stats in sorted(self.filters.items()):
+                lines.append(
+                    f'{prefix}_{name}{{filter="{_escape(f_key)}",pos="{_escape(pos)}"}}'
+                    f" {stats[column]}"
+                )
+
+        histograms = [
+            (
+                "candidates_per_doc",
+                "Candidate matches of a doc that went through the filters.",
+                self.candidates_per_doc,
+            ),
+            ("matches_per_doc", "Matches of a doc.", self.matches_per_doc),
+        ]
+        for name, help_text, histogram in histograms:
+            metric(name, "histogram", help_text)
+            for bound, count in histogram.cumulative():
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{prefix}_{name}_sum {histogram.sum}")
+            lines.append(f"{prefix}_{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = "mwe_detector"):
+        """Writes `to_prometheus` to `path`, e.g. for the textfile collector of the node exporter. The file is replaced atomically, so it is never read half-written."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(tmp_path, path)
@@ -0,0 +1,90 @@
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Iterable, Mapping
+
+from .filters import F1, F2, F3, F4, F5, F6, F7, F8, Filter, PatternIds
+from .matchers import ContinuousMatcher
+from .view import lemma_id
+
+FILTER_TYPES: dict[str, type[Filter]] = {
+    "f1": F1,
+    "f2": F2,
+    "f3": F3,
+    "f4": F4,
+    "f5": F5,
+    "f6": F6,
+    "f7": F7,
+    "f8": F8,
+}
+
+if TYPE_CHECKING:
+    from .model import MWEType
+
+
+class Lexicon:
+    """Read-only view of the trained MWEs, compiled for lookup at detection time.
+    The filter data of every MWE is compiled with `Filter.compile` into `compiled`, which has the same shape as the MWE entries and can be passed to `MWEDetector.apply_filters`.
+    Lemmas are pre-hashed into `lemma_ids` (see `view.lemma_id`), the form in which they are looked up in a `DocView`.
+    MWEs whose POS is in `continuous_POS` are compiled into a single `ContinuousMatcher`.
+    All other MWEs are indexed under their anchor lemma, i.e. the first entry of their `lemmas`. Training stores lemmas rarest-first, so the anchor is the most selective lemma of the MWE. Since a candidate match needs every lemma of the MWE to occur in the doc, only MWEs whose anchor occurs in the doc need to be looked at.
+    MWEs that share their multiset of lemmas, e.g. the same lemmas with different POS, have the same candidate matches. They are grouped in `groups`, so that candidates are generated once per group.
+    """
+
+    def __init__(
+        self, mwes: Mapping[str, "MWEType"], continuous_POS: Iterable[str] = ()
+    ):
+        self.keys: list[str] = list(mwes.keys())
+        self.entries: list["MWEType"] = [mwes[key] for key in self.keys]
+        patterns: PatternIds = {}
+        self.compiled: list[dict[str, Any]] = [
+            {
+                **mwe,
+                **{
+                    f_key: filter_type.compile(mwe[f_key], patterns)  # type: ignore
+                    for f_key, filter_type in FILTER_TYPES.items()
+                },
+            }
+            for mwe in self.entries
+        ]
+
+        self.lemma_ids: list[tuple[int, ...]] = [
+            tuple(lemma_id(lemma) for lemma in mwe["lemmas"]) for mwe in self.entries
+        ]
+
+        continuous = set(continuous_POS)
+        self.anchor_index: defaultdict[int, list[int]] = defaultdict(list)
+        for i, mwe in enumerate(self.entries):
+            if not mwe["lemmas"] or mwe["pos"] in continuous:
+                continue
+            self.anchor_index[self.lemma_ids[i][0]].append(i)
+        # Members of every group of more than one MWE, by the position of each member
+        self.groups: dict[int, tuple[int, ...]] = {}
+        by_multiset: defaultdict[tuple[int, ...], list[int]] = defaultdict(list)
+        for entries in self.anchor_index.values():
+            for i in entries:
+                by_multiset[tuple(sorted(self.lemma_ids[i]))].append(i)
+        for members in by_multiset.values():
+            if len(members) > 1:
+                members.sort()
+                for i in members:
+                    self.groups[i] = tuple(members)
+        # Largest discontinuity accepted by F4, used to prune discontinuous candidates early
+        self.max_gaps: list[int] = [
+            max(mwe["f4"]) if mwe["f4"] else 1 for mwe in self.entries
+        ]
+        self.continuous = ContinuousMatcher(
+            (i, self.lemma_ids[i])
+            for i, mwe in enumerate(self.entries)
+            if mwe["pos"] in continuous
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, doc_lemmas: Iterable[int]) -> list[int]:
+        """Returns the positions of all discontinuous MWEs anchored in one of the `doc_lemmas` (lemma ids), in lexicon order."""
+        found: set[int] = set()
+        for lemma in doc_lemmas:
+            entries = self.anchor_index.get(lemma)
+            if entries:
+                found.update(entries)
+        return sorted(found)
@@ -0,0 +1,88 @@
+from collections import defaultdict
+from typing import Iterable, Sequence
+
+from .utils import Lemma, fold_lemma
+
+_HASH_MASK = (1 << 64) - 1
+
+
+def product_order_key(
+    lemma_order: tuple[Lemma, ...],
+    lemmas: Sequence[Lemma],
+    match_idx: tuple[int, ...],
+):
+    """Sort key reproducing the order in which `find_candidate_matches` enumerates candidate matches, i.e. the product over the occurrences of the distinct lemmas in `lemma_order`."""
+    return tuple(
+        tuple(i for i, lemma in zip(match_idx, lemmas) if lemma == ordered)
+        for ordered in lemma_order
+    )
+
+
+class ContinuousMatcher:
+    """Finds all contiguous occurrences of a set of MWEs in a single pass over a doc.
+    Lemmas of an MWE are stored by rank and not in surface order, so a contiguous match is any window of the doc holding exactly the multiset of the MWE's lemmas. Windows are compared by an additive hash of their lemmas, which is computed from prefix sums, so every window of every pattern length is looked up in constant time. Hash hits are verified against the multiset itself.
+    The result is the same as calling `find_continuous_candidate_matches` for every MWE.
+    """
+
+    def __init__(self, patterns: Iterable[tuple[int, Sequence[Lemma]]]):
+        self._patterns: dict[tuple[int, int], list[tuple[int, tuple[Lemma, ...]]]] = (
+            defaultdict(list)
+        )
+        self._lemma_orders: dict[int, tuple[Lemma, ...]] = {}
+        self._vocabulary: set[Lemma] = set()
+        lengths: set[int] = set()
+
+        for entry, lemmas in patterns:
+            if not lemmas:
+                continue
+            folded = [fold_lemma(lemma) for lemma in lemmas]
+            multiset = tuple(sorted(folded))
+            self._patterns[(len(folded), self._hash(folded))].append((entry, multiset))
+            self._lemma_orders[entry] = tuple(dict.fromkeys(folded))
+            self._vocabulary.update(folded)
+            lengths.add(len(folded))
+        self._lengths = sorted(lengths)
+
+    def __len__(self):
+        return len(self._lemma_orders)
+
+    @staticmethod
+    def _hash(lemmas: Iterable[Lemma]) -> int:
+        return sum(hash(lemma) for lemma in lemmas) & _HASH_MASK
+
+    def find(self, token_lemmas: Sequence[Lemma]) -> dict[int, list[tuple[int, ...]]]:
+        """Returns the contiguous matches of every MWE occurring in `token_lemmas` (lower-cased strings or lemma ids), keyed by the MWE's position in the lexicon."""
+        matches: defaultdict[int, list[tuple[int, ...]]] = defaultdict(list)
+        if not self._lengths:
+            return matches
+
+        prefix = [0]
+        run = 0
+        for end, tok_lemma in enumerate(token_lemmas, start=1):
+            prefix.append(prefix[-1] + hash(tok_lemma))
+            # Length of the run of lexicon lemmas ending at this token
+            run = run + 1 if tok_lemma in self._vocabulary else 0
+            for length in self._lengths:
+                if length > run:
+                    break
+                start = end - length
+                found = self._patterns.get(
+                    (length, (prefix[end] - prefix[start]) & _HASH_MASK)
+                )
+                if not found:
+                    continue
+                window = token_lemmas[start:end]
+                multiset = tuple(sorted(window))
+                for entry, pattern in found:
+                    if pattern == multiset:
+                        matches[entry].append(tuple(range(start, end)))
+
+        for entry, entry_matches in matches.items():
+            if len(entry_matches) > 1:
+                lemma_order = self._lemma_orders[entry]
+                entry_matches.sort(
+                    key=lambda match_idx: product_order_key(
+                        lemma_order, [token_lemmas[i] for i in match_idx], match_idx
+                    )
+                )
+        return matches
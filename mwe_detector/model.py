@@ -1,18 +1,35 @@
 # Functional libraries
+import multiprocessing
 import os
+import warnings
 
 # Utilities
-from collections import defaultdict
+from collections import defaultdict, deque
+from copy import copy, deepcopy
+from functools import partial
+from multiprocessing.pool import AsyncResult
 from pathlib import Path
+from weakref import WeakKeyDictionary
 
 # Type hints
-from typing import Any, Optional, TypedDict
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    MutableMapping,
+    Optional,
+    TypedDict,
+    Union,
+    cast,
+)
 
 import srsly
 from spacy.language import Language
-from spacy.tokens import Doc, Token
-from spacy.util import ensure_path
+from spacy.tokens import Doc, DocBin, Span, SpanGroup, Token
+from spacy.util import ensure_path, minibatch
+from spacy.vocab import Vocab
 
+from .cache import FileCache, LRUCache
 from .filters import (
     F1,
     F2,
@@ -23,6 +40,7 @@ from .filters import (
     F7,
     F8,
     ExampleType,
+    UniqueList,
     F1Data,
     F2Data,
     F3Data,
@@ -32,10 +50,91 @@ from .filters import (
     F7Data,
     F8Data,
 )
-from .utils import find_candidate_matches, find_continuous_candidate_matches
+from .instrumentation import Instrumentation
+from .lexicon import FILTER_TYPES, Lexicon
+from .matchers import product_order_key
+from .plans import order_filters
+from .serialization import (
+    StaleModelError,
+    read_binary,
+    source_stamp,
+    write_binary,
+)
+from .utils import iter_candidate_matches
+from .view import DocView
+
+# Span group holding the matches in the "spans" output mode
+SPANS_KEY = "mwe"
+OUTPUT_MODES = ("tokens", "spans")
+SCOPES = ("doc", "sentence", "window")
+
+# MWE key and token indices of a match
+Match = tuple[str, tuple[int, ...]]
+
+
+def _label_key(token_idx: int):
+    # The key under which spaCy stores a token extension with a default, so that docs annotated before are read alike
+    return ("._.", "wikt_mwe", token_idx, None)
+
+
+# Labels by token index formatted from the span group of a doc, with the group and its length when they were formatted
+_span_labels: "WeakKeyDictionary[Doc, tuple[SpanGroup, int, dict[int, str]]]" = (
+    WeakKeyDictionary()
+)
+
+
+def _labels_from_spans(doc: Doc) -> dict[int, str]:
+    # Formatted once per span group, rather than scanning the group for every token read
+    group = doc.spans[SPANS_KEY]
+    cached = _span_labels.get(doc)
+    if cached is not None and cached[0] is group and cached[1] == len(group):
+        return cached[2]
+    matches: defaultdict[int, set[tuple[int, str]]] = defaultdict(set)
+    for span in group:
+        for i in range(span.start, span.end):
+            matches[i].add((span.id, span.label_))
+    labels = {
+        i: "|".join(str(count) + ":" + key for count, key in sorted(token_matches))
+        for i, token_matches in matches.items()
+    }
+    _span_labels[doc] = (group, len(group), labels)
+    return labels
+
+
+def get_wikt_mwe(token: Token) -> str:
+    """Returns the label of the token, `*` if the token is not part of an MWE.
+    A label set on the token takes precedence. Otherwise the label is formatted from the matches in `doc.spans[SPANS_KEY]`, as `<number of the match>:<MWE key>` joined by `|`.
+    The labels of all tokens are formatted on the first read and reused until the span group is replaced or its length changes.
+    """
+    doc = token.doc
+    label = doc.user_data.get(_label_key(token.idx))
+    if label is not None:
+        return label
+    if SPANS_KEY not in doc.spans:
+        return "*"
+    return _labels_from_spans(doc).get(token.i, "*")
+
+
+def set_wikt_mwe(token: Token, label: str):
+    doc = token.doc
+    if label == "*" and SPANS_KEY not in doc.spans:
+        doc.user_data.pop(_label_key(token.idx), None)
+    else:
+        doc.user_data[_label_key(token.idx)] = label
+
+
+def _register_extension():
+    # An extension registered elsewhere without getter or setter, e.g. with a default, is replaced
+    if Token.has_extension("wikt_mwe"):
+        _, _, getter, setter = Token.get_extension("wikt_mwe")
+        if getter is not None and setter is not None:
+            return
+    Token.set_extension(
+        "wikt_mwe", getter=get_wikt_mwe, setter=set_wikt_mwe, force=True
+    )
 
-if not Token.has_extension("wikt_mwe"):
-    Token.set_extension("wikt_mwe", default="*")
+
+_register_extension()
 
 
 class Filters(TypedDict):
@@ -67,24 +166,57 @@ class MWEDetectorDataSerialized(TypedDict):
     active_filters: dict[str, list[str]]
 
 
+def _default_mwe() -> MWEType:
+    return {
+        "pos": "",
+        "lemmas": [],
+        "f1": F1.default_data(),
+        "f2": F2.default_data(),
+        "f3": F3.default_data(),
+        "f4": F4.default_data(),
+        "f5": F5.default_data(),
+        "f6": F6.default_data(),
+        "f7": F7.default_data(),
+        "f8": F8.default_data(),
+    }
+
+
+# Loaded data by (path, lang, exclude, verify), shared by all detectors loaded with `from_disk(..., cache=True)`
+_data_cache: FileCache["MWEDetectorData"] = FileCache()
+
+
+def clear_cache(path: Optional[str] = None):
+    """Drops the data loaded with `MWEDetector.from_disk(..., cache=True)`, for all paths or only for `path`.
+    Detectors already holding the data keep it. Changed files are picked up without clearing the cache.
+    """
+    if path is None:
+        _data_cache.clear()
+    else:
+        real_path = os.path.realpath(path)
+        _data_cache.clear(lambda key: key[0] == real_path)  # type: ignore
+
+
+# Filter decisions cached by default, see `MWEDetector._passes_cached`
+DECISION_CACHE_SIZE = 0
+
+
+def _discontinuity(match_idx: tuple[int, ...]) -> int:
+    # Largest gap of a sorted candidate match, as measured by F4
+    return max([b - a for a, b in zip(match_idx, match_idx[1:])], default=0)
+
+
+# Default factories are module-level (no lambdas), so that the detector can be pickled, e.g. for nlp.pipe(n_process=...)
+_default_active_filters: partial[list[str]] = partial(list, ["f2", "f4", "f5"])
+_all_filters: partial[list[str]] = partial(
+    list, ["f1", "f2", "f3", "f4", "f5", "f6", "f7", "f8"]
+)
+
+
 class MWEDetectorData:
     def __init__(self):
-        self.mwes: defaultdict[str, MWEType] = defaultdict(
-            lambda: {
-                "pos": "",
-                "lemmas": [],
-                "f1": F1.default_data(),
-                "f2": F2.default_data(),
-                "f3": F3.default_data(),
-                "f4": F4.default_data(),
-                "f5": F5.default_data(),
-                "f6": F6.default_data(),
-                "f7": F7.default_data(),
-                "f8": F8.default_data(),
-            }
-        )
+        self.mwes: defaultdict[str, MWEType] = defaultdict(_default_mwe)
         self.active_filters: defaultdict[str, list[str]] = defaultdict(
-            lambda: ["f2", "f4", "f5"],
+            _default_active_filters,
             {
                 "ADJ": ["f2", "f4", "f5"],
                 "ADP": ["f2", "f4", "f5"],
@@ -105,34 +237,211 @@ class MWEDetectorData:
             },
         )
         self.continuous_POS = ["ADJ", "ADV", "ADP", "CONJ", "INTJ", "NOUN", "PROPN"]
+        self._lexicon: Optional[Lexicon] = None
+        self._shared = False
+
+    @property
+    def lexicon(self) -> Lexicon:
+        if self._lexicon is None:
+            self._lexicon = Lexicon(self.mwes, self.continuous_POS)
+        return self._lexicon
+
+    def compile(self) -> Lexicon:
+        """Compiles the lexicon now rather than on first use, e.g. before forking worker processes that should share it. Returns it."""
+        return self.lexicon
+
+    def invalidate(self):
+        """Drops the compiled lexicon. Needs to be called whenever `mwes` or `continuous_POS` is modified."""
+        self._lexicon = None
+
+    def share(self) -> "MWEDetectorData":
+        """Returns a copy that shares the MWEs and the compiled lexicon with this data, but has its own active filters.
+        The copy detaches itself, i.e. copies the MWEs, before they are modified through `__setitem__`, `MWEs`, `from_dict`, `merge` or training, so this data is never modified through it. Reading them copies nothing.
+        """
+        shared = MWEDetectorData()
+        shared.mwes = self.mwes
+        shared.active_filters = defaultdict(
+            self.active_filters.default_factory,
+            {pos: list(filters) for pos, filters in self.active_filters.items()},
+        )
+        shared.continuous_POS = list(self.continuous_POS)
+        shared._lexicon = self.lexicon
+        shared._shared = True
+        return shared
+
+    def detach(self):
+        """Copies the MWEs if they are shared with other data, see `share`, before they are modified. Drops the shared compiled lexicon."""
+        if self._shared:
+            self.mwes = deepcopy(self.mwes)
+            self._shared = False
+            self.invalidate()
+
+    def __getstate__(self):
+        # Only the MWEs are shipped, the lexicon is derived from them and recompiled on first use
+        state = self.__dict__.copy()
+        state["_lexicon"] = None
+        # The unpickled MWEs are a copy of their own
+        state["_shared"] = False
+        return state
 
     def to_dict(self):
         mwes_copy = {}
         for key, value in self.mwes.items():
             value_copy = value.copy()
             value_copy["f7"] = list(value_copy["f7"])
+            for f_key in ["f1", "f2", "f3", "f4"]:
+                if isinstance(value_copy[f_key], UniqueList):
+                    value_copy[f_key] = list(value_copy[f_key])  # type: ignore
             mwes_copy[key] = value_copy
 
-        return {
-            "mwes": mwes_copy,
-            "active_filters": self.active_filters
-        }
+        return {"mwes": mwes_copy, "active_filters": self.active_filters}
 
     def from_dict(self, data: MWEDetectorDataSerialized):
+        if self._shared:
+            self.mwes = defaultdict(_default_mwe)
+            self._shared = False
         self.mwes.clear()
         self.mwes.update(data["mwes"])
         self.active_filters.clear()
         self.active_filters.update(data["active_filters"])
+        self.invalidate()
 
-    def __getitem__(self, key: str):
-        return self.mwes[key]
+    def merge(self, other: "MWEDetectorData"):
+        """Adds the MWEs of `other`, e.g. trained on another shard or corpus, to this data. The active filters are kept.
+        The result is the same as training on this data's corpus and then on `other`'s: MWEs new in `other` are appended in their order, the lemmas and POS of `other` win, and the filter data is merged by `Filter.merge`.
+        """
+        self.detach()
+        for key, mwe in other.mwes.items():
+            merged = self.mwes[key]
+            merged["lemmas"] = list(mwe["lemmas"])
+            merged["pos"] = mwe["pos"]
+            for f_key, filter_type in FILTER_TYPES.items():
+                filter_type.merge(merged[f_key], deepcopy(mwe[f_key]))  # type: ignore
+        self.invalidate()
+
+    def __getitem__(self, key: str) -> "MWEEntry":
+        return MWEs(self)[key]
 
     def __setitem__(self, key: str, value: MWEType):
+        self.detach()
         self.mwes[key] = value
+        self.invalidate()
+
+
+def _freeze(value: Any) -> Any:
+    # Lists and sets of an MWE are handed out as tuples and frozensets, changes made in place would be missed
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+class MWEs(MutableMapping[str, Any]):
+    """The MWEs of `MWEDetectorData` by key, as returned by `MWEDetector.mwes`.
+    Reading doesn't copy MWEs shared with other data (see `MWEDetectorData.share`). Setting or deleting an MWE, or a field of an MWE (see `MWEEntry`), detaches the data and drops its compiled lexicon, so that the change takes effect.
+    """
+
+    def __init__(self, data: MWEDetectorData):
+        self._data = data
+
+    def __getitem__(self, key: str) -> "MWEEntry":
+        if key not in self._data.mwes:
+            raise KeyError(key)
+        return MWEEntry(self._data, key)
+
+    def __setitem__(self, key: str, value: MWEType):
+        self._data[key] = value
+
+    def __delitem__(self, key: str):
+        if key not in self._data.mwes:
+            raise KeyError(key)
+        self._data.detach()
+        del self._data.mwes[key]
+        self._data.invalidate()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data.mwes)
+
+    def __len__(self) -> int:
+        return len(self._data.mwes)
+
+    def __repr__(self):
+        return repr(dict(self._data.mwes))
+
+
+class MWEEntry(MutableMapping[str, Any]):
+    """An MWE of `MWEs`. Its lists and sets are returned as tuples and frozensets, a field is changed by setting it.
+    Compares equal to the entry, e.g. a dict read from JSON, that holds the same data.
+    """
+
+    def __init__(self, data: MWEDetectorData, key: str):
+        self._data = data
+        self._key = key
+
+    def _entry(self) -> dict[str, Any]:
+        # Looked up on every access, the data may have been detached since
+        entry = self._data.mwes.get(self._key)
+        if entry is None:
+            raise KeyError(self._key)
+        return entry  # type: ignore
+
+    def __getitem__(self, field: str) -> Any:
+        return _freeze(self._entry()[field])
+
+    def __setitem__(self, field: str, value: Any):
+        self._entry()
+        self._data.detach()
+        self._entry()[field] = value
+        self._data.invalidate()
+
+    def __delitem__(self, field: str):
+        self._entry()
+        self._data.detach()
+        del self._entry()[field]
+        self._data.invalidate()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entry())
+
+    def __len__(self) -> int:
+        return len(self._entry())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, MWEEntry):
+            other = other._entry()
+        return self._entry() == other
+
+    def __repr__(self):
+        return repr(self._entry())
 
 
 class MWEDetector:
-    def __init__(self, nlp: Language):
+    def __init__(
+        self,
+        nlp: Language,
+        output_mode: str = "tokens",
+        decision_cache_size: int = DECISION_CACHE_SIZE,
+        result_cache_size: int = 0,
+        scope: str = "doc",
+        window_size: int = 100,
+    ):
+        """`output_mode` is either "tokens", to set the label of every token that is part of an MWE, or "spans", to only record the matches in `doc.spans[SPANS_KEY]`.
+        In both modes, `token._.wikt_mwe` returns the label of a token. In the "spans" mode, a match is stored as one span per contiguous run of its tokens, labelled with the MWE key. All spans of a match share their `id`, the 1-based number of the match in the doc.
+        `decision_cache_size` bounds the number of filter decisions kept in `decision_cache`, 0 disables the cache. `result_cache_size` bounds the number of docs whose matches are kept in `result_cache`, see `_result_cache`.
+        `scope` is the part of a doc in which the tokens of a match are searched and filtered: the whole doc, each of its sentences (`doc.sents`, the whole doc if it has no sentence boundaries), or each consecutive window of `window_size` tokens. Matches that cross a sentence or window boundary are not found. Matches are numbered sentence by sentence (window by window), in lexicon order within each.
+        """
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(
+                f"Unknown output mode {output_mode}, expected one of {OUTPUT_MODES}."
+            )
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown scope {scope}, expected one of {SCOPES}.")
+        if window_size < 1:
+            raise ValueError(f"Window size must be positive, got {window_size}.")
+        self.output_mode = output_mode
+        self.scope = scope
+        self.window_size = window_size
         self._data = MWEDetectorData()
         self._filters: Filters = {
             "f1": F1(),
@@ -147,10 +456,31 @@ class MWEDetector:
         if not nlp.lang:
             raise ValueError()
         self._lang = nlp.lang
+        self.instrumentation: Optional[Instrumentation] = None
+        # (microseconds per call, rejection rate) by (filter, MWE POS), see `calibrate`
+        self.filter_stats: dict[tuple[str, str], tuple[float, float]] = {}
+        # Active filters and their execution plan by MWE POS
+        self._plans: dict[str, tuple[list[str], tuple[str, ...]]] = {}
+        # Decisions by (lexicon entry, filter, signature), for the entries of `_decisions_lexicon`
+        self.decision_cache: LRUCache[bool] = LRUCache(decision_cache_size)
+        self._decisions_lexicon: Optional[Lexicon] = None
+        # Matches by `DocView.key`, for the lexicon and active filters of `_results_state`
+        self.result_cache: LRUCache[list[Match]] = LRUCache(result_cache_size)
+        self._results_state: Optional[tuple[Any, ...]] = None
+
+    def __getstate__(self):
+        # The lexicon is not shipped (see `MWEDetectorData.__getstate__`), nor the results cached for it
+        state = self.__dict__.copy()
+        state["decision_cache"] = LRUCache(self.decision_cache.maxsize)
+        state["_decisions_lexicon"] = None
+        state["result_cache"] = LRUCache(self.result_cache.maxsize)
+        state["_results_state"] = None
+        return state
 
     @property
-    def mwes(self):
-        return self._data.mwes
+    def mwes(self) -> MWEs:
+        """The MWEs of the detector, see `MWEs`. Changes made through it take effect on the next detection."""
+        return MWEs(self._data)
 
     @property
     def filters(self):
@@ -162,9 +492,20 @@ class MWEDetector:
 
     @active_filters.setter
     def active_filters(self, new_active_filters: dict[str, list[str]]):
-        self._data.active_filters = defaultdict(
-            lambda: ["f1", "f2", "f3", "f4", "f5", "f6", "f7", "f8"], new_active_filters
-        )
+        self._data.active_filters = defaultdict(_all_filters, new_active_filters)
+
+    def enable_instrumentation(self) -> Instrumentation:
+        """Starts recording filter and per-doc statistics, see `Instrumentation`. Returns the statistics, which are kept if instrumentation was already enabled.
+        While disabled, detection only checks that `instrumentation` is None once per candidate match.
+        """
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation()
+        return self.instrumentation
+
+    def disable_instrumentation(self) -> Optional[Instrumentation]:
+        """Stops recording statistics and returns those recorded so far, if any."""
+        instrumentation, self.instrumentation = self.instrumentation, None
+        return instrumentation
 
     def _example_to_key(self, example: ExampleType):
         # lemmas = example["lemmas"]
@@ -207,10 +548,26 @@ class MWEDetector:
 
         return sorted_lemmas
 
-    def _doc_to_example_type(self, doc: Doc, mwe_label: str, rank_dict: Optional[dict[str, int]] = None):
-        match_idx = tuple(
-            [i for i, tok in enumerate(doc) if mwe_label in tok._.wikt_mwe]
-        )
+    def _parse_labels(self, doc: Doc) -> dict[str, tuple[int, ...]]:
+        """Maps every MWE label annotated in `doc` to the indices of its tokens."""
+        labels: defaultdict[str, list[int]] = defaultdict(list)
+        for i, tok in enumerate(doc):
+            tok_labels = tok._.wikt_mwe
+            if tok_labels == "*":
+                continue
+            for mwe_label in tok_labels.split("|"):
+                labels[mwe_label].append(i)
+        return {mwe_label: tuple(idx) for mwe_label, idx in labels.items()}
+
+    def _doc_to_example_type(
+        self,
+        doc: Doc,
+        mwe_label: str,
+        rank_dict: Optional[dict[str, int]] = None,
+        match_idx: Optional[tuple[int, ...]] = None,
+    ):
+        if match_idx is None:
+            match_idx = self._parse_labels(doc).get(mwe_label, ())
         lemmas = self._sort_lemmas_by_rank(
             [doc[i].lemma_ for i in match_idx], rank_dict
         )
@@ -229,82 +586,484 @@ class MWEDetector:
 
     def train_from_example(self, example: ExampleType):
         mwe_key = self._example_to_key(example)
-        self.mwes[mwe_key]["lemmas"] = example["lemmas"]
-        self.mwes[mwe_key]["pos"] = example["pos"]
+        self._data.detach()
+        # Filter data is looked up by the filter keys
+        mwe = cast(dict[str, Any], self._data.mwes[mwe_key])
+        mwe["lemmas"] = example["lemmas"]
+        mwe["pos"] = example["pos"]
+        self._data.invalidate()
+        for f_key in ["f1", "f2", "f3", "f4", "f7"]:
+            # Data read from disk holds plain lists
+            if type(mwe[f_key]) is list:
+                mwe[f_key] = UniqueList(mwe[f_key])
 
         for filter_key in self._filters.keys():
             self._filters[filter_key].add_example(  # type: ignore
-                self.mwes[mwe_key][filter_key], example
+                mwe[filter_key], example
             )
 
-    def train(self, examples: list[Doc], rank_dict: Optional[dict[str, int]] = None):
-        for doc in examples:
-            mwes_present: set[str] = {
-                mwe
-                for tok in doc
-                if tok._.wikt_mwe != "*"
-                for mwe in tok._.wikt_mwe.split("|")
-            }
-            for mwe in mwes_present:
-                example = self._doc_to_example_type(doc, mwe, rank_dict)
+    def train(
+        self,
+        examples: Iterable[Doc],
+        rank_dict: Optional[dict[str, int]] = None,
+        n_process: int = 1,
+        shard_size: int = 1000,
+    ):
+        """Trains on the MWEs annotated in `token._.wikt_mwe` of the `examples`, which are consumed as they come, so they can be streamed (see `iter_cupt_to_spacy`).
+        With `n_process` > 1, the examples are split into shards of `shard_size` docs, which are trained on in worker processes and merged in order. At most two shards per process are read ahead. The result is the same as training in a single process.
+        """
+        if n_process == 1:
+            for doc in examples:
+                self._train_doc(doc, rank_dict)
+            return
+
+        trainer = copy(self)
+        trainer._data = MWEDetectorData()
+        shards = (
+            DocBin(docs=shard, store_user_data=True).to_bytes()
+            for shard in minibatch(examples, size=shard_size)
+        )
+        with multiprocessing.Pool(
+            n_process,
+            initializer=_init_training_worker,
+            initargs=(trainer, rank_dict),
+        ) as pool:
+            # Pool.imap would read all shards ahead, so the shards in flight are bounded by hand
+            pending: deque[AsyncResult] = deque()
+            for shard in shards:
+                pending.append(pool.apply_async(_train_shard, (shard,)))
+                if len(pending) >= 2 * n_process:
+                    self._data.merge(pending.popleft().get())
+            while pending:
+                self._data.merge(pending.popleft().get())
+
+    def _train_doc(self, doc: Doc, rank_dict: Optional[dict[str, int]]):
+        labels = self._parse_labels(doc)
+        # Sorted, so that MWEs are added in the same order in every process
+        for mwe in sorted(labels):
+            example = self._doc_to_example_type(doc, mwe, rank_dict, labels[mwe])
 
-                self.train_from_example(example)
+            self.train_from_example(example)
+
+    def merge(self, other: "MWEDetector"):
+        """Adds the MWEs of `other`, see `MWEDetectorData.merge`."""
+        self._data.merge(other._data)
+        return self
 
     def apply_filters(
-        self, doc: Doc, mwe: MWEType, match_idx: tuple[int, ...]
+        self,
+        doc: Union[Doc, DocView],
+        mwe: Union[MWEType, dict[str, Any]],
+        match_idx: tuple[int, ...],
     ) -> tuple[bool, ...]:
+        f_keys = self.active_filters[mwe["pos"]]
+        if self.instrumentation is not None:
+            return self.instrumentation.apply_filters(
+                self._filters, f_keys, doc, mwe, match_idx  # type: ignore
+            )
         filter_results: tuple[bool, ...] = tuple(
             [
                 self._filters[f_key].filter(mwe[f_key], doc, match_idx)  # type: ignore
-                for f_key in self.active_filters[mwe["pos"]]
+                for f_key in f_keys
             ]
         )
         return filter_results
 
-    def __call__(self, doc: Doc) -> Doc:
-        predictions = ["*" for _ in doc]
-        count: int = 0
-        for mwe_key, mwe in self.mwes.items():
-            lemmas = mwe["lemmas"]
-            pos = mwe["pos"]
-            token_lemmas = [tok.lemma_ for tok in doc]
-            matches = (
-                find_continuous_candidate_matches(lemmas, token_lemmas)
-                if pos in self._data.continuous_POS
-                else find_candidate_matches(lemmas, token_lemmas)
+    def _plan(self, pos: str) -> tuple[str, ...]:
+        """The active filters of `pos` in the order they are applied, see `order_filters`. Plans are recompiled when the active filters change."""
+        f_keys = self.active_filters[pos]
+        plan = self._plans.get(pos)
+        if plan is None or plan[0] != f_keys:
+            plan = self._plans[pos] = (
+                list(f_keys),
+                order_filters(pos, f_keys, self.filter_stats),
+            )
+        return plan[1]
+
+    def _passes(
+        self,
+        doc: Union[Doc, DocView],
+        mwe: Union[MWEType, dict[str, Any]],
+        match_idx: tuple[int, ...],
+        plan: tuple[str, ...],
+    ) -> bool:
+        """Same as `all(self.apply_filters(doc, mwe, match_idx))`, but stops at the first filter of `plan` that rejects the match."""
+        if self.instrumentation is not None:
+            return self.instrumentation.passes(
+                self._filters, plan, doc, mwe, match_idx  # type: ignore
             )
-            for match_idx in matches:
+        filters = self._filters
+        return all(
+            filters[f_key].filter(mwe[f_key], doc, match_idx)  # type: ignore
+            for f_key in plan
+        )
+
+    def _passes_cached(
+        self,
+        view: DocView,
+        entry: int,
+        mwe: Union[MWEType, dict[str, Any]],
+        match_idx: tuple[int, ...],
+        plan: tuple[str, ...],
+    ) -> bool:
+        """Same as `_passes`, but looks the decisions of the filters that have a signature (see `Filter.signature`) up in `decision_cache`, by the lexicon `entry` of `mwe`.
+        Filters without a signature, which depend on the whole doc, are always applied. With instrumentation, only the filters that are applied are recorded.
+        """
+        decisions = self.decision_cache
+        filters = self._filters
+        # The filter data is looked up by the keys of the plan
+        data = cast(dict[str, Any], mwe)
+        for f_key in plan:
+            f = filters[f_key]  # type: ignore
+            signature = f.signature(view, match_idx)
+            if signature is None:
+                passed = None
+            else:
+                key = (entry, f_key, signature)
+                passed = decisions.get(key)
+            if passed is None:
+                if self.instrumentation is not None:
+                    passed = self.instrumentation.call(
+                        filters, f_key, view, mwe, match_idx  # type: ignore
+                    )
+                else:
+                    passed = f.filter(data[f_key], view, match_idx)
+                if signature is not None:
+                    decisions[key] = passed
+            if not passed:
+                return False
+        return True
+
+    def calibrate(
+        self, docs: Iterable[Doc], batch_size: int = 128, prune: bool = False
+    ):
+        """Measures the cost and rejection rate of every active filter by MWE POS on `docs`, to order the filters of the execution plans by them (see `order_filters`).
+        Every active filter is applied to every candidate match, so the stats don't depend on the current plans. The docs are not annotated. Returns the stats, which are also stored in `filter_stats`.
+        Candidates are generated without the F4 bound, as pruning would drop most of the candidates F4 rejects and hide its selectivity. This enumerates every combination of lemma positions, which takes longer than detection on long docs. With `prune`, candidates are pruned as during detection instead.
+        """
+        instrumentation = Instrumentation()
+        lexicon = self._data.lexicon
+        for batch in minibatch(docs, size=batch_size):
+            views = [DocView(doc) for doc in batch]
+            for view, candidates in zip(views, self._find_candidates(views, prune)):
+                for entry in candidates:
+                    mwe = lexicon.compiled[entry]
+                    f_keys = self.active_filters[mwe["pos"]]
+                    for match_idx in candidates[entry]:
+                        if match_idx != ():
+                            instrumentation.apply_filters(
+                                self._filters, f_keys, view, mwe, match_idx  # type: ignore
+                            )
+            self._reset_filters()
+        self.filter_stats = {
+            key: (seconds / calls * 1e6, rejections / calls)
+            for key, (calls, rejections, seconds) in instrumentation.filters.items()
+        }
+        self._plans = {}
+        return self.filter_stats
+
+    def _reset_filters(self):
+        """Drops the per-doc state of the filters after a batch, see `Filter.reset`."""
+        for f in self._filters.values():
+            f.reset()
+
+    def _find_candidates(
+        self, views: list[DocView], prune: bool = True
+    ) -> list[dict[int, Iterable[tuple[int, ...]]]]:
+        """Resolves the lexicon against a batch of doc views.
+        Returns for every doc the candidate matches of each MWE that can occur in it, keyed by the MWE's position in the lexicon. Every MWE anchored in the batch is looked up and set up once for all docs containing its anchor. Without `prune`, discontinuous candidates are not bounded by their MWE's largest gap (see `_max_gap`).
+        The candidates of a group of MWEs sharing their lemmas (see `Lexicon.groups`) are generated once per doc. Every member gets those within its own largest gap, in the order in which `iter_candidate_matches` would enumerate them for it.
+        """
+        lexicon = self._data.lexicon
+        candidates: list[dict[int, Iterable[tuple[int, ...]]]] = []
+        docs_by_lemma: defaultdict[int, list[int]] = defaultdict(list)
+        for i, view in enumerate(views):
+            for lemma in view.lemma_positions:
+                docs_by_lemma[lemma].append(i)  # type: ignore
+            candidates.append(dict(lexicon.continuous.find(view.lemmas)))
+
+        grouped: set[int] = set()
+        for entry in lexicon.lookup(docs_by_lemma.keys()):
+            lemmas = lexicon.lemma_ids[entry]
+            members = lexicon.groups.get(entry)
+            if members is None:
+                max_gap = self._max_gap(entry) if prune else None
+                for i in docs_by_lemma[lemmas[0]]:
+                    candidates[i][entry] = iter_candidate_matches(
+                        lemmas, views[i].lemma_positions, max_gap
+                    )
+                continue
+            if members[0] in grouped:
+                continue
+            grouped.add(members[0])
+
+            max_gaps = [self._max_gap(member) if prune else None for member in members]
+            group_gap = None if None in max_gaps else max(max_gaps)  # type: ignore
+            lemma_order = tuple(dict.fromkeys(lemmas))
+            for i in docs_by_lemma[lemmas[0]]:
+                shared = list(
+                    iter_candidate_matches(lemmas, views[i].lemma_positions, group_gap)
+                )
+                for member, max_gap in zip(members, max_gaps):
+                    member_candidates = shared
+                    if max_gap != group_gap:
+                        member_candidates = [
+                            match_idx
+                            for match_idx in shared
+                            if _discontinuity(match_idx) <= max_gap  # type: ignore
+                        ]
+                    member_order = tuple(dict.fromkeys(lexicon.lemma_ids[member]))
+                    if member_order != lemma_order:
+                        doc_lemmas = views[i].lemmas
+                        member_candidates = sorted(
+                            member_candidates,
+                            key=lambda match_idx: product_order_key(
+                                member_order,
+                                [doc_lemmas[j] for j in match_idx],
+                                match_idx,
+                            ),
+                        )
+                    candidates[i][member] = member_candidates
+        return candidates
+
+    def _max_gap(self, entry: int) -> Optional[int]:
+        """Largest gap of the candidates of the MWE at `entry` of the lexicon, None if F4 is not active for its POS."""
+        lexicon = self._data.lexicon
+        if "f4" in self.active_filters[lexicon.compiled[entry]["pos"]]:
+            return lexicon.max_gaps[entry]
+        return None
+
+    def _result_cache(self) -> Optional[LRUCache[list[Match]]]:
+        """The cache of the matches of docs seen before, None if disabled.
+        It is cleared whenever the lexicon, the active filters or the scope have changed since it was last used. Docs whose matches are replayed from the cache are not recorded by instrumentation.
+        """
+        if self.result_cache.maxsize <= 0:
+            return None
+        state = (
+            self._data.lexicon,
+            self.active_filters.default_factory,
+            {pos: list(f_keys) for pos, f_keys in self.active_filters.items()},
+            self.scope,
+            self.window_size,
+        )
+        # The lexicon and the default factory compare by identity
+        if state != self._results_state:
+            self.result_cache.clear()
+            self._results_state = state
+        return self.result_cache
+
+    def _annotate(self, views: list[DocView]) -> list[Doc]:
+        """Finds the matches of a batch of doc views and writes them to the docs. Matches of docs in the result cache are replayed."""
+        results = self._result_cache()
+        matches: list[Optional[list[Match]]] = [None] * len(views)
+        keys: list[bytes] = []
+        if results is not None:
+            keys = [view.key() for view in views]
+            matches = [results.get(key) for key in keys]
+        misses = [i for i, doc_matches in enumerate(matches) if doc_matches is None]
+        if misses:
+            segments = [self._segments(views[i]) for i in misses]
+            candidates = iter(
+                self._find_candidates([view for parts in segments for view in parts])
+            )
+            for i, parts in zip(misses, segments):
+                doc_matches: list[Match] = []
+                n_candidates = 0
+                for part in parts:
+                    part_matches, part_candidates = self._match(part, next(candidates))
+                    doc_matches += part_matches
+                    n_candidates += part_candidates
+                if self.instrumentation is not None:
+                    self.instrumentation.record_doc(n_candidates, len(doc_matches))
+                matches[i] = doc_matches
+                if results is not None:
+                    results[keys[i]] = doc_matches
+            self._reset_filters()
+        return [
+            self._write(view, doc_matches)  # type: ignore
+            for view, doc_matches in zip(views, matches)
+        ]
+
+    def _segments(self, view: DocView) -> list[DocView]:
+        """The views of the parts of the doc in which matches are searched, see `scope`."""
+        if self.scope == "doc":
+            return [view]
+        if self.scope == "sentence":
+            bounds = view.sentences()
+            if len(bounds) == 1:
+                return [view]
+        else:
+            bounds = [
+                (start, start + self.window_size)
+                for start in range(0, len(view), self.window_size)
+            ]
+        return [view.slice(start, end) for start, end in bounds]
+
+    def _match(
+        self, view: DocView, candidates: dict[int, Iterable[tuple[int, ...]]]
+    ) -> tuple[list[Match], int]:
+        """The matches among the `candidates` of `view`, by token indices in the doc, and the number of candidates."""
+        lexicon = self._data.lexicon
+        cached = self.decision_cache.maxsize > 0
+        if cached and self._decisions_lexicon is not lexicon:
+            self.decision_cache.clear()
+            self._decisions_lexicon = lexicon
+        matches: list[Match] = []
+        n_candidates = 0
+        for entry in sorted(candidates):
+            mwe_key, mwe = lexicon.keys[entry], lexicon.compiled[entry]
+            plan = self._plan(mwe["pos"])
+            for match_idx in candidates[entry]:
                 if match_idx == ():
                     continue
-                filter_results = self.apply_filters(doc, mwe, match_idx)
-                if all(filter_results):
-                    count += 1
-                    for idx in match_idx:
-                        label = str(count) + ":" + mwe_key
-
-                        predictions[idx] = (
-                            label
-                            if predictions[idx] == "*"
-                            else predictions[idx] + "|" + label
-                        )
-        for i, tok in enumerate(doc):
-            tok._.wikt_mwe = predictions[i]
+                n_candidates += 1
+                if cached:
+                    passed = self._passes_cached(view, entry, mwe, match_idx, plan)
+                else:
+                    passed = self._passes(view, mwe, match_idx, plan)
+                if passed:
+                    if view.start:
+                        match_idx = tuple([i + view.start for i in match_idx])
+                    matches.append((mwe_key, match_idx))
+        return matches, n_candidates
+
+    def _write(self, view: DocView, matches: list[Match]) -> Doc:
+        if self.output_mode == "spans":
+            self._write_spans(view, matches)
+        else:
+            self._write_labels(view, matches)
+        return view.doc
+
+    def _write_labels(self, view: DocView, matches: list[Match]):
+        doc = view.doc
+        if SPANS_KEY in doc.spans:
+            del doc.spans[SPANS_KEY]
+        labels: defaultdict[int, list[str]] = defaultdict(list)
+        for count, (mwe_key, match_idx) in enumerate(matches, start=1):
+            label = str(count) + ":" + mwe_key
+            for idx in match_idx:
+                labels[idx].append(label)
+        # Labels are stored as set_wikt_mwe does, unlabelled tokens are left out
+        user_data = doc.user_data
+        for i, token_idx in enumerate(view.idx):
+            if i in labels:
+                user_data[_label_key(token_idx)] = "|".join(labels[i])
+            elif user_data:
+                user_data.pop(_label_key(token_idx), None)
 
-        return doc
+    def _write_spans(self, view: DocView, matches: list[Match]):
+        doc = view.doc
+        user_data = doc.user_data
+        if user_data:
+            for token_idx in view.idx:
+                user_data.pop(_label_key(token_idx), None)
+        spans: list[Span] = []
+        for count, (mwe_key, match_idx) in enumerate(matches, start=1):
+            idx = sorted(match_idx)
+            start = idx[0]
+            for previous, current in zip(idx, idx[1:] + [-1]):
+                if current != previous + 1:
+                    spans.append(
+                        Span(doc, start, previous + 1, label=mwe_key, span_id=count)
+                    )
+                    start = current
+        doc.spans[SPANS_KEY] = spans
+
+    def __call__(self, doc: Doc) -> Doc:
+        return self._annotate([DocView(doc)])[0]
+
+    def pipe(self, docs: Iterable[Doc], batch_size: int = 128) -> Iterator[Doc]:
+        for batch in minibatch(docs, size=batch_size):
+            yield from self._annotate([DocView(doc) for doc in batch])
+
+    def _binary_paths(self, path: str) -> tuple[str, str]:
+        return (
+            os.path.join(path, self._lang + "_data.msgpack"),
+            os.path.join(path, self._lang + "_data.npy"),
+        )
 
     def to_disk(self, path: str, exclude: tuple[Any, ...] = tuple()):
+        """Writes the data both in the binary format and as JSON. Either can be skipped by excluding "binary" or "json"."""
         path_save: Path = ensure_path(path)
         if not path_save.exists():
             path_save.mkdir()
 
-        srsly.write_json(  # type: ignore
-            os.path.join(path, self._lang + "_data.json"), self._data.to_dict()
-        )
+        data = self._data.to_dict()
+        json_path = os.path.join(path, self._lang + "_data.json")
+        source = None
+        if "json" not in exclude:
+            srsly.write_json(json_path, data)  # type: ignore
+            source = source_stamp(json_path)
+        if "binary" not in exclude:
+            write_binary(data, *self._binary_paths(path), source=source)
 
-    def from_disk(self, path: str, exclude: tuple[Any, ...] = tuple()):
-        file_path = os.path.join(path, self._lang + "_data.json")
-        path_save = ensure_path(file_path)
+    def _read(
+        self, path: str, exclude: tuple[Any, ...], verify: bool = False
+    ) -> MWEDetectorDataSerialized:
+        header_path, arrays_path = self._binary_paths(path)
+        json_path = os.path.join(path, self._lang + "_data.json")
+        if (
+            "binary" not in exclude
+            and os.path.exists(header_path)
+            and os.path.exists(arrays_path)
+        ):
+            try:
+                return read_binary(header_path, arrays_path, json_path, verify)
+            except StaleModelError as e:
+                warnings.warn(f"{e} Reading the JSON data instead.")
+        path_save = ensure_path(json_path)
         data: MWEDetectorDataSerialized = srsly.read_json(path_save)  # type: ignore
+        return data
+
+    def _load(
+        self, path: str, exclude: tuple[Any, ...], verify: bool = False
+    ) -> MWEDetectorData:
+        data = MWEDetectorData()
+        data.from_dict(self._read(path, exclude, verify))
+        # Compile the lexicon right away, so that forked worker processes share it
+        data.compile()
+        return data
+
+    def from_disk(
+        self,
+        path: str,
+        exclude: tuple[Any, ...] = tuple(),
+        cache: bool = False,
+        verify: bool = False,
+    ):
+        """Reads the data from the binary format if present (and not excluded), from JSON otherwise. Binary data that was not written from the JSON data next to it is ignored with a warning. The JSON data is compared by size and modification time, with `verify` by content.
+        With `cache`, the data and its compiled lexicon are loaded once per process and shared by all detectors loaded from the same path, until one of the files changes or `clear_cache` is called. A detector copies the shared MWEs before it is trained.
+        """
+        if not cache:
+            self._data.from_dict(self._read(path, exclude, verify))
+            # Compile the lexicon right away, so that forked worker processes share it
+            self._data.compile()
+            return self
 
-        self._data.from_dict(data)
+        exclude = tuple(sorted(exclude))
+        key = (os.path.realpath(path), self._lang, exclude, verify)
+        files = [
+            *self._binary_paths(key[0]),
+            os.path.join(key[0], self._lang + "_data.json"),
+        ]
+        self._data = _data_cache.get(
+            key, files, lambda: self._load(path, exclude, verify)
+        ).share()
         return self
+
+
+# Detector without MWEs and rank dictionary of a training worker process
+_training_worker: Optional[tuple[MWEDetector, Optional[dict[str, int]]]] = None
+
+
+def _init_training_worker(trainer: MWEDetector, rank_dict: Optional[dict[str, int]]):
+    global _training_worker
+    _training_worker = (trainer, rank_dict)
+
+
+def _train_shard(shard: bytes) -> MWEDetectorData:
+    assert _training_worker is not None
+    trainer, rank_dict = _training_worker
+    trainer._data = MWEDetectorData()
+    trainer.train(DocBin().from_bytes(shard).get_docs(Vocab()), rank_dict)
+    return trainer._data
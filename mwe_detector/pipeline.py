@@ -9,7 +9,7 @@ from mwe_detector.model import MWEDetector
 FN = os.path.join(os.path.dirname(__file__), "data")
 
 
-assigns = ["token._.wikt_mwe"]
+assigns = ["token._.wikt_mwe", "doc.spans"]
 requires = ["token.lemma", "token.pos", "token.dep", "token.head", "token.morph"]
 
 
@@ -17,10 +17,34 @@ requires = ["token.lemma", "token.pos", "token.dep", "token.head", "token.morph"
     "mwe_detector",
     assigns=assigns,
     requires=requires,
+    default_config={
+        "cache": True,
+        "output_mode": "tokens",
+        "decision_cache_size": 0,
+        "result_cache_size": 0,
+        "scope": "doc",
+        "window_size": 100,
+    },
 )
-def create_mwe_detector_fr(nlp: Language, name: str):
-    mweDetector = MWEDetector(nlp)
-    mweDetector.from_disk(FN)
+def create_mwe_detector_fr(
+    nlp: Language,
+    name: str,
+    cache: bool,
+    output_mode: str,
+    decision_cache_size: int,
+    result_cache_size: int,
+    scope: str,
+    window_size: int,
+):
+    mweDetector = MWEDetector(
+        nlp,
+        output_mode=output_mode,
+        decision_cache_size=decision_cache_size,
+        result_cache_size=result_cache_size,
+        scope=scope,
+        window_size=window_size,
+    )
+    mweDetector.from_disk(FN, cache=cache)
     return mweDetector
 
 
@@ -28,8 +52,9 @@ def create_mwe_detector_fr(nlp: Language, name: str):
 #     "mwe_detector",
 #     assigns=assigns,
 #     requires=requires,
+#     default_config={"cache": True, "output_mode": "tokens"},
 # )
-# def create_mwe_detector_en(nlp: Language, name: str):
-#     mweDetector = MWEDetector(nlp)
-#     mweDetector.from_disk(FN)
+# def create_mwe_detector_en(nlp: Language, name: str, cache: bool, output_mode: str):
+#     mweDetector = MWEDetector(nlp, output_mode=output_mode)
+#     mweDetector.from_disk(FN, cache=cache)
 #     return mweDetector
@@ -0,0 +1,37 @@
+from typing import Iterable, Mapping
+
+# Time per call of the reference loop of benchmarks/bench_hot_paths.py on the machine the default filter costs were measured on
+BENCHMARK_REFERENCE_US = 0.2
+# (microseconds per call, share of rejected candidates) of every filter, used until `MWEDetector.calibrate` measured them on a corpus.
+# Costs are the times per call of benchmarks/bench_hot_paths.py, which reports the defaults that drifted from its measurements. Rejection rates are guesses, F2 and F4 reject most candidates.
+DEFAULT_FILTER_STATS: dict[str, tuple[float, float]] = {
+    "f1": (1.36, 0.2),
+    "f2": (1.02, 0.5),
+    "f3": (1.32, 0.2),
+    "f4": (1.72, 0.5),
+    "f5": (8.75, 0.2),
+    "f6": (0.56, 0.2),
+    "f7": (0.98, 0.2),
+    "f8": (0.13, 0.1),
+}
+
+# Stands in for a rejection rate of 0, so that filters that never reject are ordered by cost
+_MIN_REJECTION_RATE = 1e-6
+
+
+def order_filters(
+    pos: str,
+    f_keys: Iterable[str],
+    stats: Mapping[tuple[str, str], tuple[float, float]],
+) -> tuple[str, ...]:
+    """Execution plan of the filters `f_keys` of the MWEs of POS `pos`, i.e. the order in which they are applied until one rejects a candidate.
+    Filters are ordered by cost per rejection (cost / rejection rate), which minimizes the expected cost of a candidate if filters reject independently of each other. The stats are looked up by (filter, POS) in `stats`, then in `DEFAULT_FILTER_STATS`. Ties keep the order of `f_keys`.
+    """
+
+    def cost_per_rejection(f_key: str) -> float:
+        cost, rejection_rate = stats.get(
+            (f_key, pos), DEFAULT_FILTER_STATS.get(f_key, (1.0, 0.0))
+        )
+        return cost / max(rejection_rate, _MIN_REJECTION_RATE)
+
+    return tuple(sorted(f_keys, key=cost_per_rejection))
@@ -0,0 +1,193 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Hashable, Iterable, Optional, Union
+
+import numpy as np
+import srsly
+
+if TYPE_CHECKING:
+    from .model import MWEDetectorDataSerialized, MWEType
+
+FORMAT_VERSION = 1
+PATTERN_FILTERS = ("f1", "f2", "f3")
+
+
+class StaleModelError(ValueError):
+    """Raised when binary data is older than the JSON data it was written from."""
+
+
+def _digest(path: Union[str, Path]) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def source_stamp(path: Union[str, Path]) -> dict[str, Any]:
+    """Size, modification time and SHA-1 of the file at `path`, recorded by `write_binary` to recognize the JSON data the binary data was written from."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": _digest(path)}
+
+
+class _Table:
+    """Assigns consecutive ids to distinct values."""
+
+    def __init__(self):
+        self.ids: dict[Hashable, int] = {}
+
+    def __call__(self, value: Hashable) -> int:
+        return self.ids.setdefault(value, len(self.ids))
+
+
+def _write_ragged(rows: Iterable[Iterable[int]]) -> tuple[list[int], list[int]]:
+    offsets: list[int] = [0]
+    values: list[int] = []
+    for row in rows:
+        values.extend(row)
+        offsets.append(len(values))
+    return offsets, values
+
+
+def write_binary(
+    data: "MWEDetectorDataSerialized",
+    header_path: Union[str, Path],
+    arrays_path: Union[str, Path],
+    source: Optional[dict[str, Any]] = None,
+):
+    """Writes the data in the binary format.
+    All strings (lemmas, POS tags, inflections) are interned into one table in the msgpack header, and all POS patterns of F1, F2 and F3 into a pattern table. Each MWE is encoded as a row of ids: its POS, then its lemmas, F1, F2 and F3 patterns, F4 gaps and F7 inflections, each preceded by their number. Pattern table and MWE rows are ragged int32 arrays, concatenated into a single NumPy file.
+    `source` is the `source_stamp` of the JSON file holding the same data, if any, see `read_binary`.
+    """
+    strings = _Table()
+    patterns = _Table()
+
+    def row(mwe: "MWEType") -> list[int]:
+        values = [strings(mwe["pos"])]
+        values += [len(mwe["lemmas"])] + [strings(lemma) for lemma in mwe["lemmas"]]
+        for f_key in PATTERN_FILTERS:
+            pos_patterns: list[list[str]] = mwe[f_key]  # type: ignore
+            values.append(len(pos_patterns))
+            values += [
+                patterns(tuple(strings(pos) for pos in pattern))
+                for pattern in pos_patterns
+            ]
+        values += [len(mwe["f4"])] + list(mwe["f4"])
+        values += [len(mwe["f7"])] + [strings(number) for number in mwe["f7"]]
+        return values
+
+    row_offsets, row_values = _write_ragged(row(mwe) for mwe in data["mwes"].values())
+    pattern_offsets, pattern_values = _write_ragged(patterns.ids.keys())  # type: ignore
+
+    sections: dict[str, list[int]] = {}
+    arrays: list[int] = []
+    for name, values in [
+        ("pattern_offsets", pattern_offsets),
+        ("pattern_values", pattern_values),
+        ("row_offsets", row_offsets),
+        ("row_values", row_values),
+    ]:
+        sections[name] = [len(arrays), len(arrays) + len(values)]
+        arrays += values
+
+    header = {
+        "version": FORMAT_VERSION,
+        "strings": list(strings.ids.keys()),
+        "keys": list(data["mwes"].keys()),
+        "active_filters": dict(data["active_filters"]),
+        "sections": sections,
+        "source": source,
+    }
+    srsly.write_msgpack(header_path, header)
+    np.save(arrays_path, np.asarray(arrays, dtype=np.int32))
+
+
+def _decode_row(
+    values: list[int], strings: list[str], patterns: list[list[str]]
+) -> "MWEType":
+    position = 1
+
+    def read(table: list) -> list:
+        nonlocal position
+        length = values[position]
+        position += length + 1
+        return [table[i] for i in values[position - length : position]]
+
+    lemmas = read(strings)
+    # Pattern lists are shared between MWEs, training only ever appends to the outer lists
+    f1, f2, f3 = read(patterns), read(patterns), read(patterns)
+    length = values[position]
+    f4 = values[position + 1 : position + 1 + length]
+    position += length + 1
+    f7 = read(strings)
+    return {
+        "pos": strings[values[0]],
+        "lemmas": lemmas,
+        "f1": f1,
+        "f2": f2,
+        "f3": f3,
+        "f4": f4,
+        "f5": None,
+        "f6": None,
+        "f7": f7,  # type: ignore
+        "f8": None,
+    }
+
+
+def _is_stale(
+    header: dict[str, Any],
+    header_path: Union[str, Path],
+    source_path: Union[str, Path],
+    verify: bool,
+) -> bool:
+    source = header.get("source")
+    if source is None:
+        # Written without its JSON source, stale if the JSON file was written later
+        return os.stat(source_path).st_mtime_ns > os.stat(header_path).st_mtime_ns
+    if verify:
+        return source["sha1"] != _digest(source_path)
+    stat = os.stat(source_path)
+    return (source["size"], source["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns)
+
+
+def read_binary(
+    header_path: Union[str, Path],
+    arrays_path: Union[str, Path],
+    source_path: Optional[Union[str, Path]] = None,
+    verify: bool = False,
+) -> "MWEDetectorDataSerialized":
+    """Reads data written by `write_binary`. All MWEs are decoded on load, as the lexicon compiles them right away anyway. Compared to JSON, the format saves parsing and allocates every string once. The arrays are read into memory, not memory-mapped.
+    Raises `StaleModelError` if the JSON file at `source_path` exists and is not the one the data was written from, or was written later if that is unknown. The JSON file is recognized by its size and modification time, or with `verify` by its content, which means hashing the whole file.
+    """
+    header: dict[str, Any] = srsly.read_msgpack(header_path)
+    version = header.get("version")
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported model format version {version}, expected {FORMAT_VERSION}."
+        )
+    if (
+        source_path is not None
+        and os.path.exists(source_path)
+        and _is_stale(header, header_path, source_path, verify)
+    ):
+        raise StaleModelError(
+            f"{header_path} was not written from the current {source_path}."
+        )
+
+    arrays = np.load(arrays_path)
+    section = {
+        name: arrays[start:end].tolist()
+        for name, (start, end) in header["sections"].items()
+    }
+    # Strings are shared by all MWEs instead of being allocated once per occurrence as when reading JSON
+    strings: list[str] = header["strings"]
+    pattern_offsets = section["pattern_offsets"]
+    pattern_values = section["pattern_values"]
+    patterns = [
+        [strings[i] for i in pattern_values[start:end]]
+        for start, end in zip(pattern_offsets, pattern_offsets[1:])
+    ]
+    row_offsets, row_values = section["row_offsets"], section["row_values"]
+    mwes = {
+        key: _decode_row(row_values[start:end], strings, patterns)
+        for key, start, end in zip(header["keys"], row_offsets, row_offsets[1:])
+    }
+    return {"mwes": mwes, "active_filters": header["active_filters"]}
@@ -1,55 +1,98 @@
+from bisect import insort
 from collections import defaultdict
-from itertools import combinations, product
-from typing import Union
+from typing import Iterator, Optional, Sequence, TypeAlias, Union
 
 import numpy as np
 
+# Lemmas are either strings, matched case-insensitively, or ids of lower-cased lemmas (see `view.lemma_id`)
+Lemma: TypeAlias = Union[str, int]
+LemmaPositions: TypeAlias = dict[Lemma, list[int]]
+
 
 def checkConsecutive(l: tuple[int, ...]):
     n = len(l) - 1
     return sum(np.diff(sorted(l)) == 1) >= n
 
 
-def find_candidate_matches(
-    lemmas: list[str], token_lemmas: list[str]
-) -> list[tuple[int, ...]]:
-    lemma_counts: defaultdict[str, int] = defaultdict(int)
+def fold_lemma(lemma: Lemma) -> Lemma:
+    return lemma.lower() if isinstance(lemma, str) else lemma
+
+
+def get_lemma_positions(token_lemmas: Sequence[Lemma]) -> LemmaPositions:
+    """Maps every lower-cased lemma of a doc to the (ascending) indices of the tokens carrying it."""
+    positions: defaultdict[Lemma, list[int]] = defaultdict(list)
+    for i, tok_lemma in enumerate(token_lemmas):
+        positions[fold_lemma(tok_lemma)].append(i)
+    return dict(positions)
+
+
+def _missing_tokens(chosen: list[int], max_gap: int) -> int:
+    """Number of tokens that still have to be placed between the `chosen` (sorted) indices so that no gap is larger than `max_gap`."""
+    return sum((b - a - 1) // max_gap for a, b in zip(chosen, chosen[1:]))
+
+
+def iter_candidate_matches(
+    lemmas: Sequence[Lemma],
+    token_lemmas: Union[Sequence[Lemma], LemmaPositions],
+    max_gap: Optional[int] = None,
+) -> Iterator[tuple[int, ...]]:
+    """Lazily enumerates the candidate matches of `find_candidate_matches`, in the same order.
+    Every copy of a lemma is a slot that is filled with one of the lemma's occurrences, copies of the same lemma with increasing indices. If `max_gap` is given, only candidates whose largest discontinuity is at most `max_gap` are produced (cf. F4): a partial candidate is abandoned as soon as its gaps can no longer be closed by the remaining slots.
+    """
+    lemma_positions = (
+        token_lemmas
+        if isinstance(token_lemmas, dict)
+        else get_lemma_positions(token_lemmas)
+    )
+    lemma_counts: defaultdict[Lemma, int] = defaultdict(int)
     for lemma in lemmas:
-        lemma_counts[lemma.lower()] += 1
+        lemma_counts[fold_lemma(lemma)] += 1
 
-    drawn: list[Union[list[int], list[tuple[int, ...]]]] = []
+    slots: list[tuple[list[int], bool]] = []
     for lemma, count in lemma_counts.items():
-        matched_tokens = [
-            i for i, tok_lemma in enumerate(token_lemmas) if tok_lemma.lower() == lemma
-        ]
-        if len(matched_tokens) == 0:
-            return []
-
-        if count > 1:
-            comb = list(combinations(matched_tokens, count))
-            drawn.append(comb)
-        else:
-            drawn.append(matched_tokens)
-
-    candidate_matches: Union[product[tuple[int, ...]], list[tuple[int]]] = (
-        product(*drawn) if len(drawn) > 0 else []
-    )
+        matched_tokens = lemma_positions.get(lemma, [])
+        if len(matched_tokens) < count:
+            return
+        for copy in range(count):
+            slots.append((matched_tokens, copy > 0))
+    if not slots:
+        return
 
-    match_idxs: list[tuple[int, ...]] = []
-    for tuple_item in candidate_matches:
-        flattened_tuple: list[int] = []
-        for item in tuple_item:
-            if isinstance(item, tuple):
-                flattened_tuple.extend(item)
+    n_slots = len(slots)
+    chosen: list[int] = []
+
+    def fill(slot: int, first: int) -> Iterator[tuple[int, ...]]:
+        matched_tokens, _ = slots[slot]
+        next_repeats = slot + 1 < n_slots and slots[slot + 1][1]
+        for k in range(first, len(matched_tokens)):
+            idx = matched_tokens[k]
+            insort(chosen, idx)
+            slots_left = n_slots - len(chosen)
+            if max_gap is not None and _missing_tokens(chosen, max_gap) > slots_left:
+                chosen.remove(idx)
+                if idx > chosen[-1]:
+                    # Later occurrences only widen the gap to the right
+                    break
+                continue
+            if slot + 1 == n_slots:
+                yield tuple(chosen)
             else:
-                flattened_tuple.append(item)
-        match_idxs.append(tuple(sorted(flattened_tuple)))
+                yield from fill(slot + 1, k + 1 if next_repeats else 0)
+            chosen.remove(idx)
 
-    return match_idxs
+    yield from fill(0, 0)
+
+
+def find_candidate_matches(
+    lemmas: list[str],
+    token_lemmas: Union[list[str], LemmaPositions],
+    max_gap: Optional[int] = None,
+) -> list[tuple[int, ...]]:
+    return list(iter_candidate_matches(lemmas, token_lemmas, max_gap))
 
 
 def find_continuous_candidate_matches(
-    lemmas: list[str], token_lemmas: list[str]
+    lemmas: list[str], token_lemmas: Union[list[str], LemmaPositions]
 ) -> list[tuple[int, ...]]:
     match_idxs_with_discontinuities = find_candidate_matches(lemmas, token_lemmas)
     match_idxs: list[tuple[int, ...]] = []
@@ -0,0 +1,123 @@
+from typing import Optional, Union
+
+import numpy as np
+from spacy.attrs import HEAD, IDX, LEMMA, MORPH, POS, SENT_START
+from spacy.parts_of_speech import IDS as POS_IDS
+from spacy.strings import get_string_id
+from spacy.tokens import Doc
+
+from .utils import LemmaPositions, get_lemma_positions
+
+# Id of POS tags that spaCy doesn't know, they never occur in a doc
+UNKNOWN_POS = -1
+NOUN = POS_IDS["NOUN"]
+
+# Hashes are the same for every vocab, so the lookups are shared by all docs.
+# They are emptied when they reach `LOOKUP_SIZE` entries, so that a stream of new lemmas and morphologies doesn't fill the memory.
+LOOKUP_SIZE = 100000
+_lemma_ids: dict[int, int] = {}
+_numbers: dict[int, Optional[str]] = {}
+
+
+def lemma_id(lemma: str) -> int:
+    """Id of the lower-cased `lemma`, the form in which lemmas are matched."""
+    return get_string_id(lemma.lower())
+
+
+def pos_id(pos: str) -> int:
+    return int(POS_IDS.get(pos, UNKNOWN_POS))
+
+
+def _parse_number(features: str) -> Optional[str]:
+    # Same as `Token.morph.get("Number")[0]`, features are "Field=Value,Value|Field=Value"
+    for feature in features.split("|"):
+        field, _, values = feature.partition("=")
+        if field == "Number":
+            return values.split(",")[0]
+    return None
+
+
+class DocView:
+    """Columnar, integer-coded view of a doc, read once with `Doc.to_array`.
+    Matching and filtering look tokens up in these columns instead of creating `Token` objects and decoding their strings. Lemmas are lower-cased and identified by `lemma_id`, POS tags by their spaCy symbol (`pos_id`), heads are absolute token indices, `idx` holds the character offsets of the tokens. The Number feature is decoded on demand.
+    A view can also cover a slice of the doc (see `slice`), starting at token `start`. Its token indices are relative to the slice.
+    """
+
+    def __init__(self, doc: Doc):
+        self.doc = doc
+        columns = doc.to_array([LEMMA, POS, HEAD, MORPH, IDX, SENT_START])
+        strings = doc.vocab.strings
+        if len(_lemma_ids) >= LOOKUP_SIZE:
+            _lemma_ids.clear()
+        lemmas: list[int] = []
+        for lemma in columns[:, 0].tolist():
+            folded = _lemma_ids.get(lemma)
+            if folded is None:
+                folded = _lemma_ids[lemma] = lemma_id(strings[lemma])
+            lemmas.append(folded)
+        self.lemmas = lemmas
+        self.pos: list[int] = columns[:, 1].tolist()
+        # HEAD holds the offset to the head as unsigned integer
+        self.heads: list[int] = (
+            columns[:, 2].astype(np.int64) + np.arange(len(doc))
+        ).tolist()
+        self._morphs: list[int] = columns[:, 3].tolist()
+        self.idx: list[int] = columns[:, 4].tolist()
+        self._columns = columns
+        self._lemma_positions: Optional[LemmaPositions] = None
+        self.start = 0
+
+    def slice(self, start: int, end: int) -> "DocView":
+        """View of the tokens `start` to `end` of this view, as if they were a doc of their own. Heads outside of the slice are replaced by the token itself, as for the root of a sentence."""
+        view = DocView.__new__(DocView)
+        view.doc = self.doc
+        view.lemmas = self.lemmas[start:end]
+        view.pos = self.pos[start:end]
+        view.heads = [
+            head - start if start <= head < end else i
+            for i, head in enumerate(self.heads[start:end])
+        ]
+        view._morphs = self._morphs[start:end]
+        view.idx = self.idx[start:end]
+        view._columns = self._columns[start:end]
+        view._lemma_positions = None
+        view.start = self.start + start
+        return view
+
+    def sentences(self) -> list[tuple[int, int]]:
+        """Start and end of every sentence, the whole view if the doc has no sentence boundaries."""
+        if not len(self) or not self.doc.has_annotation("SENT_START"):
+            return [(0, len(self))]
+        starts = [
+            i for i, sent_start in enumerate(self._columns[:, 5]) if sent_start == 1
+        ]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        return list(zip(starts, starts[1:] + [len(self)]))
+
+    def __len__(self):
+        return len(self.lemmas)
+
+    @property
+    def lemma_positions(self) -> LemmaPositions:
+        """Token indices of every lemma id, see `get_lemma_positions`."""
+        if self._lemma_positions is None:
+            self._lemma_positions = get_lemma_positions(self.lemmas)
+        return self._lemma_positions
+
+    def key(self) -> bytes:
+        """The lemma, POS, head, morph and sentence start columns as bytes. Docs with the same key have the same matches."""
+        return self._columns[:, [0, 1, 2, 3, 5]].tobytes()
+
+    def number(self, i: int) -> Optional[str]:
+        """First value of the Number feature of token `i`, if any."""
+        morph = self._morphs[i]
+        if morph not in _numbers:
+            if len(_numbers) >= LOOKUP_SIZE:
+                _numbers.clear()
+            _numbers[morph] = _parse_number(self.doc.vocab.strings[morph])
+        return _numbers[morph]
+
+
+def as_view(doc: Union[Doc, DocView]) -> DocView:
+    return doc if isinstance(doc, DocView) else DocView(doc)
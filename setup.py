@@ -11,7 +11,7 @@ setuptools.setup(
     packages=["mwe_detector"],
     zip_safe=False,
     include_package_data=True,
-    package_data={"mwe_detector": ["data/*.json"]},
+    package_data={"mwe_detector": ["data/*.json", "data/*.msgpack", "data/*.npy"]},
     python_requires=">=3.10",
     install_requires=["numpy>=1.15.0", "spacy>=3.7.2", "srsly>=2.4.6", "ujson>=5.8.0"],
     extras_require={
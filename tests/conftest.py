@@ -0,0 +1,86 @@
+import pytest
+import spacy
+from spacy.language import Language
+from spacy.tokens import Doc
+
+from mwe_detector.model import MWEDetector
+
+
+@pytest.fixture
+def nlp():
+    return spacy.blank("fr")
+
+
+def _mwe(lemmas: list[str], pos: str, f2: list[list[str]], f4: list[int]):
+    return {
+        "pos": pos,
+        "lemmas": lemmas,
+        "f1": [],
+        "f2": f2,
+        "f3": [],
+        "f4": f4,
+        "f5": None,
+        "f6": None,
+        "f7": [],
+        "f8": None,
+    }
+
+
+@pytest.fixture
+def detector(nlp: Language):
+    detector = MWEDetector(nlp)
+    detector._data.from_dict(
+        {
+            "mwes": {
+                "aller bon train:VERB": _mwe(
+                    ["train", "bon", "aller"], "VERB", [["VERB", "ADJ", "NOUN"]], [1]
+                ),
+                "mettre la main à la pâte:VERB": _mwe(
+                    ["pâte", "main", "mettre"], "VERB", [["VERB", "NOUN", "NOUN"]], [3]
+                ),
+                "pomme de terre:NOUN": _mwe(
+                    ["pomme", "terre", "de"], "NOUN", [["NOUN", "ADP", "NOUN"]], [1]
+                ),
+            },
+            "active_filters": {"VERB": ["f2", "f4", "f5"], "NOUN": ["f2", "f4", "f5"]},
+        }
+    )
+    return detector
+
+
+def _doc(nlp: Language, tokens: list[tuple[str, str, str]]):
+    words, lemmas, pos = zip(*tokens)
+    return Doc(nlp.vocab, words=list(words), lemmas=list(lemmas), pos=list(pos))
+
+
+@pytest.fixture
+def docs(nlp: Language):
+    return [
+        _doc(
+            nlp,
+            [
+                ("Les", "le", "DET"),
+                ("pommes", "pomme", "NOUN"),
+                ("de", "de", "ADP"),
+                ("terre", "terre", "NOUN"),
+                ("vont", "aller", "VERB"),
+                ("bon", "bon", "ADJ"),
+                ("train", "train", "NOUN"),
+            ],
+        ),
+        _doc(nlp, [("Rien", "rien", "PRON"), ("ici", "ici", "ADV")]),
+        _doc(
+            nlp,
+            [
+                ("Il", "il", "PRON"),
+                ("met", "mettre", "VERB"),
+                ("la", "le", "DET"),
+                ("main", "main", "NOUN"),
+                ("à", "à", "ADP"),
+                ("la", "le", "DET"),
+                ("pâte", "pâte", "NOUN"),
+                ("de", "de", "ADP"),
+                ("terre", "terre", "NOUN"),
+            ],
+        ),
+    ]
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+from spacy.language import Language
+
+from mwe_detector import clear_cache
+from mwe_detector.cache import LRUCache
+from mwe_detector.model import MWEDetector
+
+from .conftest import _mwe
+
+
+@pytest.fixture
+def path(nlp: Language, tmp_path):
+    detector = MWEDetector(nlp)
+    detector._data.from_dict(
+        {
+            "mwes": {
+                "pomme de terre:NOUN": _mwe(
+                    ["pomme", "terre", "de"], "NOUN", [["NOUN", "ADP", "NOUN"]], [1]
+                ),
+            },
+            "active_filters": {"NOUN": ["f2", "f4", "f5"]},
+        }
+    )
+    detector.to_disk(str(tmp_path))
+    yield str(tmp_path)
+    clear_cache()
+
+
+def test_shared_lexicon(nlp: Language, path: str):
+    first = MWEDetector(nlp).from_disk(path, cache=True)
+    second = MWEDetector(nlp).from_disk(path, cache=True)
+    assert first._data.lexicon is second._data.lexicon
+    assert first._data.mwes is second._data.mwes
+
+    private = MWEDetector(nlp).from_disk(path)
+    assert private._data.lexicon is not first._data.lexicon
+
+
+def test_active_filters_are_not_shared(nlp: Language, path: str):
+    first = MWEDetector(nlp).from_disk(path, cache=True)
+    first.active_filters["NOUN"].remove("f5")
+    second = MWEDetector(nlp).from_disk(path, cache=True)
+    assert second.active_filters["NOUN"] == ["f2", "f4", "f5"]
+
+
+def test_reload_on_change(nlp: Language, path: str):
+    first = MWEDetector(nlp).from_disk(path, cache=True)
+    # Touching the JSON data too would make the binary data stale, see `read_binary`
+    for name in ["fr_data.msgpack", "fr_data.npy"]:
+        stat = os.stat(os.path.join(path, name))
+        os.utime(os.path.join(path, name), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    second = MWEDetector(nlp).from_disk(path, cache=True)
+    assert first._data.lexicon is not second._data.lexicon
+
+
+def test_clear_cache(nlp: Language, path: str):
+    first = MWEDetector(nlp).from_disk(path, cache=True)
+    clear_cache(path)
+    second = MWEDetector(nlp).from_disk(path, cache=True)
+    assert first._data.lexicon is not second._data.lexicon
+    assert dict(first.mwes) == dict(second.mwes)
+
+
+def test_copy_on_write(nlp: Language, path: str):
+    trained = MWEDetector(nlp).from_disk(path, cache=True)
+    lexicon = trained._data.lexicon
+    trained._data["aller bon train:VERB"] = _mwe(
+        ["train", "bon", "aller"], "VERB", [["VERB", "ADJ", "NOUN"]], [1]
+    )
+
+    other = MWEDetector(nlp).from_disk(path, cache=True)
+    assert other._data.lexicon is lexicon
+    assert list(other.mwes) == ["pomme de terre:NOUN"]
+    assert len(trained._data.lexicon) == 2
+
+
+def test_lru_cache():
+    cache: LRUCache[bool] = LRUCache(2)
+    assert cache.get("a") is None
+    cache["a"] = True
+    cache["b"] = False
+    assert cache.get("a") is True
+    assert cache.get("b") is False
+    # "a" was used less recently than "b"
+    cache.get("b")
+    cache["c"] = True
+    assert cache.get("a") is None
+    assert len(cache) == 2
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 3,
+        "misses": 2,
+        "evictions": 1,
+        "hit_rate": 0.6,
+    }
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 3
+
+    disabled: LRUCache[bool] = LRUCache(0)
+    disabled["a"] = True
+    assert len(disabled) == 0
+
+
+def test_access_does_not_leak(nlp: Language, path: str):
+    first = MWEDetector(nlp).from_disk(path, cache=True)
+    lexicon = first._data.lexicon
+    with pytest.raises(KeyError):
+        first._data["aller bon train:VERB"]
+    # Reading copies nothing
+    assert len(first.mwes) == 1
+    assert first._data["pomme de terre:NOUN"]["f4"] == (1,)
+    assert first._data._shared
+
+    first.mwes["pomme de terre:NOUN"]["f2"] = [["NOUN", "NOUN"]]
+    assert first.mwes["pomme de terre:NOUN"]["f2"] == (("NOUN", "NOUN"),)
+    assert first._data.lexicon is not lexicon
+    assert first._data.lexicon.compiled[0]["f2"] != lexicon.compiled[0]["f2"]
+
+    other = MWEDetector(nlp).from_disk(path, cache=True)
+    assert other._data.lexicon is lexicon
+    assert list(other.mwes) == ["pomme de terre:NOUN"]
+    assert other.mwes["pomme de terre:NOUN"]["f2"] == (("NOUN", "ADP", "NOUN"),)
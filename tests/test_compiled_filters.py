@@ -0,0 +1,57 @@
+import pytest
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+from mwe_detector.filters import F1, F2, F3
+from mwe_detector.view import DocView, pos_id
+
+
+@pytest.fixture
+def doc():
+    return Doc(
+        Vocab(),
+        words=["The", "quick", "brown", "fox", "jumps"],
+        pos=["DET", "ADJ", "ADJ", "NOUN", "VERB"],
+    )
+
+
+def test_F1_compile():
+    assert F1.compile([["NOUN", "ADJ"], ["ADJ", "NOUN"], ["VERB"]]) == {
+        2: frozenset({(pos_id("ADJ"), pos_id("NOUN"))}),
+        1: frozenset({(pos_id("VERB"),)}),
+    }
+
+
+def test_F1_compiled_filter(doc: Doc):
+    f1 = F1()
+    data = [["ADJ", "NOUN"], ["DET", "DET"]]
+    compiled = F1.compile(data)
+    for match_idx in [(1, 3), (1, 2, 3), (0, 1), (0, 3, 4), (3,)]:
+        assert f1.filter(compiled, doc, match_idx) == f1.filter(data, doc, match_idx)
+    assert f1.filter(compiled, doc, (1, 2, 3))
+    assert not f1.filter(compiled, doc, (0, 1))
+    assert not f1.filter(F1.compile([]), doc, (1, 3))
+    assert f1.filter(F1.compile([[]]), doc, (1, 3))
+
+
+def test_F2_compiled_filter(doc: Doc):
+    f2 = F2()
+    compiled = F2.compile([["ADJ", "NOUN"], ["DET", "VERB"]])
+    assert compiled == frozenset(
+        {(pos_id("ADJ"), pos_id("NOUN")), (pos_id("DET"), pos_id("VERB"))}
+    )
+    assert f2.filter(compiled, doc, (2, 3))
+    assert f2.filter(compiled, doc, (0, 4))
+    assert not f2.filter(compiled, doc, (3, 4))
+
+
+def test_F3_compiled_filter(doc: Doc):
+    f3 = F3()
+    compiled = F3.compile([["ADJ", "ADJ", "NOUN"]])
+    assert f3.filter(compiled, doc, (1, 3))
+    assert not f3.filter(compiled, doc, (2, 3))
+
+
+def test_unknown_pos_never_matches(doc: Doc):
+    assert pos_id("UNKNOWN") not in DocView(doc).pos
+    assert not F2().filter(F2.compile([["ADJ", "UNKNOWN"]]), doc, (2, 3))
@@ -0,0 +1,44 @@
+import pytest
+
+from mwe_detector.matchers import ContinuousMatcher
+from mwe_detector.utils import find_continuous_candidate_matches
+
+
+def _find(lemmas: list[str], tokens: list[str]):
+    matcher = ContinuousMatcher([(0, lemmas)])
+    return matcher.find([tok.lower() for tok in tokens]).get(0, [])
+
+
+@pytest.mark.parametrize(
+    "lemmas,tokens",
+    [
+        ([], []),
+        (["test1", "test2"], ["test3", "test4"]),
+        (["test1"], ["test1", "test2"]),
+        (["test1", "test1"], ["test1", "test1", "test2"]),
+        (["test1", "test2"], ["test1", "test2", "test3", "test2"]),
+        (["test1", "test1", "test2", "test2"], ["test1", "test1", "test2", "test2"]),
+        (["test1", "test2"], ["test1", "test2", "test3", "test1", "test2"]),
+        (["test2", "test1"], ["test1", "test2", "test1", "test2"]),
+        (["test1", "test2", "test1"], ["test1", "test1", "test2", "test1", "test1"]),
+        (["Test1", "Test2"], ["test1", "TEST2", "test3"]),
+    ],
+)
+def test_same_matches_as_find_continuous_candidate_matches(
+    lemmas: list[str], tokens: list[str]
+):
+    assert _find(lemmas, tokens) == find_continuous_candidate_matches(lemmas, tokens)
+
+
+def test_multiple_patterns():
+    matcher = ContinuousMatcher(
+        [(0, ["test1", "test2"]), (1, ["test2"]), (2, ["test2", "test1"]), (3, [])]
+    )
+    assert len(matcher) == 3
+    matches = matcher.find(["test3", "test2", "test1", "test3"])
+    assert matches == {0: [(1, 2)], 1: [(1,)], 2: [(1, 2)]}
+
+
+def test_no_patterns():
+    matcher = ContinuousMatcher([])
+    assert matcher.find(["test1"]) == {}
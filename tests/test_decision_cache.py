@@ -0,0 +1,80 @@
+import pickle
+
+import pytest
+from spacy.language import Language
+from spacy.tokens import Doc
+
+from mwe_detector.model import MWEDetector
+
+from .conftest import _doc
+
+
+@pytest.fixture
+def cached(detector: MWEDetector, nlp: Language):
+    cached = MWEDetector(nlp, decision_cache_size=100)
+    cached._data = detector._data
+    return cached
+
+
+@pytest.mark.parametrize(
+    "active_filters",
+    [["f2", "f4", "f5"], ["f1", "f2", "f3", "f4", "f6", "f7", "f8"]],
+)
+def test_same_matches(
+    detector: MWEDetector,
+    cached: MWEDetector,
+    docs: list[Doc],
+    active_filters: list[str],
+):
+    detector.active_filters = {"VERB": active_filters, "NOUN": active_filters}
+    cached.active_filters = detector.active_filters
+    for _ in range(2):
+        for doc in docs:
+            expected = [tok._.wikt_mwe for tok in detector(doc)]
+            assert [tok._.wikt_mwe for tok in cached(doc)] == expected
+
+    stats = cached.decision_cache.stats()
+    assert stats["hits"] > 0
+    # F5, F6 and F8 depend on the doc and are not cached
+    assert {key[1] for key in cached.decision_cache._values} <= {
+        "f1",
+        "f2",
+        "f3",
+        "f4",
+        "f7",
+    }
+
+
+def test_signature_determines_decision(cached: MWEDetector, nlp: Language):
+    cached.active_filters = {"NOUN": ["f2"], "VERB": ["f2"]}
+    first = _doc(
+        nlp,
+        [("pommes", "pomme", "NOUN"), ("de", "de", "ADP"), ("terre", "terre", "NOUN")],
+    )
+    second = _doc(
+        nlp,
+        [("pommes", "pomme", "NOUN"), ("de", "de", "VERB"), ("terre", "terre", "NOUN")],
+    )
+    assert first[0]._.wikt_mwe == "*"
+    assert cached(first)[0]._.wikt_mwe == "1:pomme de terre:NOUN"
+    assert cached(second)[0]._.wikt_mwe == "*"
+    assert cached(first)[0]._.wikt_mwe == "1:pomme de terre:NOUN"
+    assert cached.decision_cache.stats()["hits"] == 1
+
+
+def test_cache_follows_lexicon(cached: MWEDetector, docs: list[Doc]):
+    cached(docs[0])
+    assert len(cached.decision_cache) > 0
+    cached.mwes["pomme de terre:NOUN"]["f2"] = []
+    labels = [tok._.wikt_mwe for tok in cached(docs[0])]
+    assert "1:pomme de terre:NOUN" not in labels
+
+    restored = pickle.loads(pickle.dumps(cached))
+    assert len(restored.decision_cache) == 0
+    assert restored.decision_cache.maxsize == 100
+    assert [tok._.wikt_mwe for tok in restored(docs[0])] == labels
+
+
+def test_disabled_by_default(detector: MWEDetector, docs: list[Doc]):
+    detector(docs[0])
+    assert detector.decision_cache.stats()["misses"] == 0
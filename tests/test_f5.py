@@ -0,0 +1,64 @@
+import pytest
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+from mwe_detector.filters import F5
+from mwe_detector.view import lemma_id
+
+
+def _ids(*lemmas: str):
+    return tuple(sorted(lemma_id(lemma) for lemma in lemmas))
+
+
+@pytest.fixture
+def doc():
+    lemmas = ["a", "b", "x", "x", "a", "x", "c", "b", "a", "A"]
+    return Doc(Vocab(), words=lemmas, lemmas=lemmas)
+
+
+def test_min_discontinuity(doc: Doc):
+    f5 = F5()
+    f5._set_doc(doc)
+    assert f5._get_min_discontinuity(_ids("a", "b")) == 1
+    assert f5._get_min_discontinuity(_ids("a", "c")) == 2
+    assert f5._get_min_discontinuity(_ids("a", "b", "c")) == 1
+    assert f5._get_min_discontinuity(_ids("a", "a")) == 0
+
+
+def test_min_discontinuity_uses_copies_of_a_lemma():
+    # a at 0, 4 and 8; c at 2; b at 12: only picking two a's closes the gaps
+    lemmas = ["a", "x", "c", "x", "a", "x", "x", "x", "a", "x", "x", "x", "b"]
+    doc = Doc(Vocab(), words=lemmas, lemmas=lemmas)
+    f5 = F5()
+    f5._set_doc(doc)
+    assert f5._get_min_discontinuity(_ids("a", "b", "c")) == 6
+    assert f5._get_min_discontinuity(_ids("a", "a", "b", "c")) == 4
+
+
+def test_filter(doc: Doc):
+    f5 = F5()
+    assert f5.filter(None, doc, (0, 1))
+    assert not f5.filter(None, doc, (1, 4))
+    assert f5.filter(None, doc, (6, 7, 8))
+    assert not f5.filter(None, doc, (0, 6, 7))
+    assert not f5.filter(None, doc, (8, 9))
+
+
+def test_memoization_is_per_doc(doc: Doc):
+    f5 = F5()
+    assert f5.filter(None, doc, (4, 6))
+    other = Doc(Vocab(), words=["a", "c", "a"], lemmas=["a", "c", "a"])
+    assert f5.filter(None, other, (0, 1))
+    assert not f5.filter(None, doc, (0, 6))
+
+
+def test_modified_doc_is_noticed(doc: Doc):
+    f5 = F5()
+    assert f5.filter(None, doc, (0, 1))
+    with doc.retokenize() as retokenizer:
+        retokenizer.merge(doc[2:4])
+    # Same doc object, whose tokens 3 and 5 are now a and c instead of x and x
+    assert f5.filter(None, doc, (3, 5))
+
+    f5.reset()
+    assert f5._doc is None
@@ -0,0 +1,58 @@
+import pytest
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+from mwe_detector.filters import F6
+
+
+@pytest.fixture
+def doc():
+    # John, who lives in New York, likes apples.
+    words = [
+        "John",
+        ",",
+        "who",
+        "lives",
+        "in",
+        "New",
+        "York",
+        ",",
+        "likes",
+        "apples",
+        ".",
+    ]
+    heads = [8, 0, 3, 0, 3, 6, 4, 0, 8, 8, 8]
+    deps = ["nsubj", "punct", "nsubj", "relcl", "prep", "compound", "pobj", "punct"]
+    deps += ["ROOT", "dobj", "punct"]
+    return Doc(Vocab(), words=words, heads=heads, deps=deps)
+
+
+def test_two_tokens(doc: Doc):
+    f6 = F6()
+    assert f6.filter(None, doc, (0, 8))
+    assert f6.filter(None, doc, (0, 4))
+    assert not f6.filter(None, doc, (0, 5))
+    assert f6.filter(None, doc, (8, 9))
+    assert not f6.filter(None, doc, (0, 9))
+
+
+def test_connected_subtree(doc: Doc):
+    f6 = F6()
+    assert f6.filter(None, doc, (0, 3, 4, 6))
+    assert f6.filter(None, doc, (0, 8, 9))
+    assert not f6.filter(None, doc, (0, 3, 4, 9))
+    assert not f6.filter(None, doc, (0, 4, 6))
+
+
+def test_single_token(doc: Doc):
+    assert F6().filter(None, doc, (5,))
+
+
+def test_modified_doc_is_noticed(doc: Doc):
+    f6 = F6()
+    assert not f6.filter(None, doc, (0, 9))
+    doc[9].head = doc[0]
+    assert f6.filter(None, doc, (0, 9))
+
+    f6.reset()
+    assert f6._doc is None
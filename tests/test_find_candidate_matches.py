@@ -1,6 +1,10 @@
 import pytest
 
-from mwe_detector.utils import find_candidate_matches
+from mwe_detector.utils import (
+    find_candidate_matches,
+    get_lemma_positions,
+    iter_candidate_matches,
+)
 
 
 def test_empty_input():
@@ -81,3 +85,56 @@ def test_indices_order_in_match_idxs():
     # Check if each tuple in the result is sorted
     for match in result:
         assert match == tuple(sorted(match)), f"Tuple {match} is not sorted"
+
+
+def test_get_lemma_positions():
+    tokens = ["Test1", "test2", "test1"]
+    assert get_lemma_positions(tokens) == {"test1": [0, 2], "test2": [1]}
+
+
+def test_precomputed_lemma_positions():
+    lemmas = ["test1", "test2"]
+    tokens = ["test1", "test2", "test3", "test2"]
+    lemma_positions = get_lemma_positions(tokens)
+    assert find_candidate_matches(lemmas, lemma_positions) == find_candidate_matches(
+        lemmas, tokens
+    )
+
+
+def test_iter_candidate_matches_is_lazy():
+    lemmas = ["test1", "test2"]
+    tokens = ["test1", "test2", "test3", "test2"]
+    matches = iter_candidate_matches(lemmas, tokens)
+    assert next(matches) == (0, 1)
+    assert list(matches) == [(0, 3)]
+
+
+def test_max_gap():
+    lemmas = ["test1", "test2"]
+    tokens = ["test1", "test2", "test3", "test2"]
+    assert find_candidate_matches(lemmas, tokens, max_gap=1) == [(0, 1)]
+    assert find_candidate_matches(lemmas, tokens, max_gap=3) == [(0, 1), (0, 3)]
+
+
+def test_max_gap_with_duplicates():
+    lemmas = ["test1", "test1", "test2", "test2"]
+    tokens = [
+        "test1",
+        "test1",
+        "test2",
+        "test2",
+        "test3",
+        "test2",
+    ]
+    assert find_candidate_matches(lemmas, tokens, max_gap=1) == [(0, 1, 2, 3)]
+    assert find_candidate_matches(lemmas, tokens, max_gap=2) == [
+        (0, 1, 2, 3),
+        (0, 1, 3, 5),
+    ]
+
+
+def test_max_gap_counts_tokens_still_to_place():
+    lemmas = ["test1", "test2", "test3"]
+    tokens = ["test1", "test3", "test3", "test2"]
+    assert find_candidate_matches(lemmas, tokens, max_gap=2) == [(0, 1, 3), (0, 2, 3)]
+    assert find_candidate_matches(lemmas, tokens, max_gap=1) == []
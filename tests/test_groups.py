@@ -0,0 +1,80 @@
+import random
+
+import pytest
+from spacy.language import Language
+
+from mwe_detector.model import MWEDetector
+from mwe_detector.view import DocView
+
+from .conftest import _doc, _mwe
+
+LEMMAS = ["pomme", "terre", "de", "train"]
+POS = ["NOUN", "VERB", "ADP", "ADJ"]
+
+
+@pytest.fixture
+def data():
+    # MWEs sharing their lemmas, which are stored in different orders, with different largest gaps and filters
+    return {
+        "mwes": {
+            "pomme de terre:VERB": _mwe(
+                ["pomme", "terre", "de"], "VERB", [["NOUN", "ADP", "NOUN"]], [1]
+            ),
+            "pomme de terre:AUX": _mwe(
+                ["de", "terre", "pomme"], "AUX", [["NOUN", "ADP", "NOUN"]], [3]
+            ),
+            "pomme de terre:DET": _mwe(
+                ["terre", "pomme", "de"], "DET", [["NOUN", "ADP", "NOUN"]], [2]
+            ),
+            "de de:VERB": _mwe(["de", "de"], "VERB", [["ADP", "ADP"]], [1]),
+            "de de:PRON": _mwe(["de", "de"], "PRON", [["ADP", "ADP"]], [4]),
+            "terre train:VERB": _mwe(
+                ["terre", "train"], "VERB", [["NOUN", "NOUN"]], [5]
+            ),
+        },
+        "active_filters": {
+            "VERB": ["f2", "f4", "f5"],
+            "AUX": ["f2", "f4"],
+            "DET": ["f2"],
+            "PRON": ["f4", "f2"],
+        },
+    }
+
+
+def test_groups_keep_matches(nlp: Language, data):
+    grouped = MWEDetector(nlp)
+    grouped._data.from_dict(data)
+    assert set(grouped._data.lexicon.groups.values()) == {(0, 1, 2), (3, 4)}
+
+    ungrouped = MWEDetector(nlp)
+    ungrouped._data.from_dict(data)
+    ungrouped._data.lexicon.groups = {}
+
+    rng = random.Random(0)
+    docs = [
+        _doc(
+            nlp,
+            [
+                (lemma, lemma, rng.choice(POS))
+                for lemma in rng.choices(LEMMAS, k=rng.randrange(2, 15))
+            ],
+        )
+        for _ in range(300)
+    ]
+    views = [DocView(doc) for doc in docs]
+    for candidates, expected in zip(
+        grouped._find_candidates(views), ungrouped._find_candidates(views)
+    ):
+        # Members of a group are left out of docs that lack the lemmas of the group
+        found = {entry: list(c) for entry, c in candidates.items()}
+        expected_found = {entry: list(c) for entry, c in expected.items()}
+        assert {entry: c for entry, c in found.items() if c} == {
+            entry: c for entry, c in expected_found.items() if c
+        }
+
+    n_labelled = 0
+    for doc in docs:
+        expected_labels = [tok._.wikt_mwe for tok in ungrouped(doc)]
+        assert [tok._.wikt_mwe for tok in grouped(doc)] == expected_labels
+        n_labelled += sum(label != "*" for label in expected_labels)
+    assert n_labelled > 0
@@ -0,0 +1,68 @@
+from spacy.tokens import Doc
+
+from mwe_detector.model import MWEDetector
+
+
+def test_disabled_by_default(detector: MWEDetector, docs: list[Doc]):
+    detector(docs[0])
+    assert detector.instrumentation is None
+    assert detector.disable_instrumentation() is None
+
+
+def test_snapshot(detector: MWEDetector, docs: list[Doc]):
+    expected = [[tok._.wikt_mwe for tok in detector(doc)] for doc in docs]
+
+    instrumentation = detector.enable_instrumentation()
+    assert detector.enable_instrumentation() is instrumentation
+    processed = list(detector.pipe(docs))
+    assert [[tok._.wikt_mwe for tok in doc] for doc in processed] == expected
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["docs"] == 3
+    assert snapshot["candidates"] == 3
+    assert snapshot["matches"] == 3
+    assert snapshot["candidates_per_doc"]["0"] == 1
+    assert snapshot["candidates_per_doc"]["+Inf"] == 3
+    assert set(snapshot["filters"]) == {"f2", "f4", "f5"}
+    assert snapshot["filters"]["f2"]["VERB"]["calls"] == 2
+    assert snapshot["filters"]["f2"]["NOUN"]["calls"] == 1
+    assert snapshot["filters"]["f2"]["VERB"]["rejection_rate"] == 0.0
+
+    assert detector.disable_instrumentation() is instrumentation
+    detector(docs[0])
+    assert instrumentation.snapshot()["docs"] == 3
+
+
+def test_rejections(detector: MWEDetector, docs: list[Doc]):
+    detector.mwes["aller bon train:VERB"]["f2"] = [["NOUN", "NOUN", "NOUN"]]
+    instrumentation = detector.enable_instrumentation()
+    labels = [tok._.wikt_mwe for tok in detector(docs[0])]
+    assert "1:aller bon train:VERB" not in labels
+
+    stats = instrumentation.snapshot()["filters"]["f2"]["VERB"]
+    assert stats == {**stats, "calls": 1, "rejections": 1, "rejection_rate": 1.0}
+    # F2 comes first in the plan, no other filter is applied after its rejection
+    assert "VERB" not in instrumentation.snapshot()["filters"]["f5"]
+    assert instrumentation.snapshot()["matches"] == 1
+
+
+def test_prometheus(detector: MWEDetector, docs: list[Doc], tmp_path):
+    instrumentation = detector.enable_instrumentation()
+    detector(docs[0])
+
+    path = str(tmp_path / "mwe_detector.prom")
+    instrumentation.write_prometheus(path)
+    with open(path) as f:
+        text = f.read()
+    assert text == instrumentation.to_prometheus()
+    lines = text.splitlines()
+    assert "# TYPE mwe_detector_filter_calls_total counter" in lines
+    assert 'mwe_detector_filter_calls_total{filter="f2",pos="NOUN"} 1' in lines
+    assert 'mwe_detector_filter_rejections_total{filter="f4",pos="VERB"} 0' in lines
+    assert 'mwe_detector_candidates_per_doc_bucket{le="2"} 1' in lines
+    assert 'mwe_detector_candidates_per_doc_bucket{le="1"} 0' in lines
+    assert "mwe_detector_matches_per_doc_sum 2" in lines
+    assert "mwe_detector_matches_per_doc_count 1" in lines
+
+    instrumentation.reset()
+    assert instrumentation.snapshot()["docs"] == 0
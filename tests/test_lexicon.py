@@ -0,0 +1,86 @@
+from mwe_detector.lexicon import Lexicon
+from mwe_detector.view import lemma_id
+
+
+def _ids(*lemmas: str):
+    return [lemma_id(lemma) for lemma in lemmas]
+
+
+def _mwe(lemmas: list[str], pos: str = "VERB"):
+    return {
+        "pos": pos,
+        "lemmas": lemmas,
+        "f1": [],
+        "f2": [],
+        "f3": [],
+        "f4": [],
+        "f5": None,
+        "f6": None,
+        "f7": [],
+        "f8": None,
+    }
+
+
+def test_empty_lexicon():
+    lexicon = Lexicon({})
+    assert len(lexicon) == 0
+    assert lexicon.lookup(_ids("test1")) == []
+
+
+def test_lookup_by_anchor_lemma():
+    lexicon = Lexicon(
+        {
+            "a": _mwe(["test1", "test2"]),
+            "b": _mwe(["test2", "test1"]),
+            "c": _mwe(["test3"]),
+        }
+    )
+    assert lexicon.lookup(_ids("test1")) == [0]
+    assert lexicon.lookup(_ids("test2", "test3")) == [1, 2]
+    assert lexicon.lookup(_ids("test4")) == []
+
+
+def test_lookup_keeps_lexicon_order():
+    lexicon = Lexicon(
+        {
+            "a": _mwe(["test2"]),
+            "b": _mwe(["test1"]),
+            "c": _mwe(["test2", "test1"]),
+        }
+    )
+    assert lexicon.lookup(_ids("test1", "test2")) == [0, 1, 2]
+
+
+def test_anchor_case_insensitivity():
+    lexicon = Lexicon({"a": _mwe(["Test1", "test2"])})
+    assert lexicon.lookup(_ids("test1")) == [0]
+
+
+def test_entries_without_lemmas_are_not_indexed():
+    lexicon = Lexicon({"a": _mwe([])})
+    assert len(lexicon) == 1
+    assert lexicon.lookup(_ids("")) == []
+
+
+def test_groups_by_lemma_multiset():
+    lexicon = Lexicon(
+        {
+            "a": _mwe(["test1", "test2"]),
+            "b": _mwe(["test1", "test2"], "NOUN"),
+            "c": _mwe(["Test2", "test1"]),
+            "d": _mwe(["test1", "test2", "test2"]),
+            "e": _mwe(["test1", "test2"], "ADV"),
+        },
+        continuous_POS=["ADV"],
+    )
+    assert lexicon.groups == {0: (0, 1, 2), 1: (0, 1, 2), 2: (0, 1, 2)}
+
+
+def test_patterns_are_compiled_once():
+    first, second = _mwe(["test1", "test2"]), _mwe(["test3", "test4"])
+    first["f2"] = [["VERB", "NOUN"]]
+    second["f2"] = [["VERB", "NOUN"], ["VERB", "ADP", "NOUN"]]
+    lexicon = Lexicon({"a": first, "b": second})
+    (pattern,) = lexicon.compiled[0]["f2"]
+    assert pattern in lexicon.compiled[1]["f2"]
+    assert any(other is pattern for other in lexicon.compiled[1]["f2"])
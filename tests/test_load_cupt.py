@@ -0,0 +1,100 @@
+import types
+
+import pytest
+import spacy
+from spacy.language import Language
+
+import load_cupt_to_spacy as loader
+from load_cupt_to_spacy import (
+    iter_cached_cupt_to_spacy,
+    iter_cupt_to_spacy,
+    load_cupt_to_spacy,
+)
+from mwe_detector.model import MWEDetector
+
+CUPT = """# global.columns = ID FORM LEMMA UPOS XPOS FEATS HEAD DEPREL DEPS MISC WIKT:MWE
+# text = Les pommes de terre.
+1	Les	le	DET	_	Definite=Def|Number=Plur	2	det	_	_	*
+2	pommes	pomme	NOUN	_	Gender=Fem|Number=Plur	0	root	_	_	1:pomme de terre:NOUN
+3	de	de	ADP	_	_	4	case	_	_	1:pomme de terre:NOUN
+4	terre	terre	NOUN	_	Gender=Fem|Number=Sing	2	nmod	_	SpaceAfter=No	1:pomme de terre:NOUN
+5	.	.	PUNCT	_	_	2	punct	_	_	*
+
+# text = Il va bon train.
+1	Il	il	PRON	_	_	2	nsubj	_	_	*
+2	va	aller	VERB	_	_	0	root	_	_	1:aller bon train:VERB
+3	bon	bon	ADJ	_	_	4	amod	_	_	1:aller bon train:VERB
+4	train	train	NOUN	_	Number=Sing	2	obl	_	SpaceAfter=No	1:aller bon train:VERB
+5	.	.	PUNCT	_	_	2	punct	_	_	*
+
+"""
+
+
+@pytest.fixture
+def nlp():
+    return spacy.blank("fr")
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "fr_train.cupt"
+    path.write_text(CUPT, encoding="utf-8")
+    return str(path)
+
+
+def test_iter_cupt_to_spacy(nlp: Language, path: str):
+    docs = iter_cupt_to_spacy(path, nlp)
+    assert isinstance(docs, types.GeneratorType)
+
+    doc = next(docs)
+    assert doc.text.strip() == "Les pommes de terre."
+    assert [tok.lemma_ for tok in doc] == ["le", "pomme", "de", "terre", "."]
+    assert [tok.head.i for tok in doc] == [1, 1, 3, 1, 1]
+    assert str(doc[3].morph) == "Gender=Fem|Number=Sing"
+    assert doc[2]._.wikt_mwe == "1:pomme de terre:NOUN"
+    assert [tok.text for tok in next(docs)][:2] == ["Il", "va"]
+    assert next(docs, None) is None
+
+
+def test_train_on_stream(nlp: Language, path: str):
+    streamed, loaded = MWEDetector(nlp), MWEDetector(nlp)
+    streamed.train(iter_cupt_to_spacy(path, nlp))
+    loaded.train(load_cupt_to_spacy(path, nlp))
+    assert list(streamed.mwes) == ["pomme de terre:NOUN", "aller bon train:VERB"]
+    assert streamed._data.to_dict() == loaded._data.to_dict()
+
+
+def _annotations(docs):
+    return [
+        [
+            (tok.text, tok.lemma_, tok.pos_, str(tok.morph), tok._.wikt_mwe)
+            for tok in doc
+        ]
+        for doc in docs
+    ]
+
+
+def test_cached_cupt_to_spacy(nlp: Language, path: str, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    expected = _annotations(iter_cupt_to_spacy(path, nlp))
+
+    # A pass that is stopped early leaves no usable cache
+    next(iter_cached_cupt_to_spacy(path, nlp, cache_dir))
+    assert _annotations(iter_cached_cupt_to_spacy(path, nlp, cache_dir)) == expected
+
+    def convert(*args):
+        raise AssertionError("The cache should have been used")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(loader, "iter_cupt_to_spacy", convert)
+        cached = _annotations(iter_cached_cupt_to_spacy(path, nlp, cache_dir))
+    assert cached == expected
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(CUPT.split("\n\n")[1] + "\n\n")
+    assert len(list(iter_cached_cupt_to_spacy(path, nlp, cache_dir))) == 3
+
+
+def test_cache_key(path: str):
+    assert loader.cupt_cache_key(path) == loader.cupt_cache_key(path, "wikt:mwe")
+    assert loader.cupt_cache_key(path) != loader.cupt_cache_key(path, "parseme:mwe")
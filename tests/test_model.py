@@ -0,0 +1,145 @@
+import pickle
+
+import pytest
+from spacy.language import Language
+from spacy.tokens import Doc, DocBin, Span, Token
+
+from mwe_detector.model import MWEDetector, _register_extension, get_wikt_mwe
+
+from .conftest import _mwe
+
+
+def test_call(detector: MWEDetector, docs: list[Doc]):
+    labels = [tok._.wikt_mwe for tok in detector(docs[0])]
+    assert labels == [
+        "*",
+        "2:pomme de terre:NOUN",
+        "2:pomme de terre:NOUN",
+        "2:pomme de terre:NOUN",
+        "1:aller bon train:VERB",
+        "1:aller bon train:VERB",
+        "1:aller bon train:VERB",
+    ]
+    assert [tok._.wikt_mwe for tok in detector(docs[1])] == ["*", "*"]
+
+    labels = [tok._.wikt_mwe for tok in detector(docs[2])]
+    assert labels[1] == labels[3] == labels[6] == "1:mettre la main à la pâte:VERB"
+    assert labels.count("*") == 6
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 10])
+def test_pipe(detector: MWEDetector, docs: list[Doc], batch_size: int):
+    expected = [[tok._.wikt_mwe for tok in detector(doc)] for doc in docs]
+    for doc in docs:
+        for tok in doc:
+            tok._.wikt_mwe = "*"
+
+    processed = list(detector.pipe(iter(docs), batch_size=batch_size))
+    assert processed == docs
+    assert [[tok._.wikt_mwe for tok in doc] for doc in processed] == expected
+
+
+def test_pickle(detector: MWEDetector, docs: list[Doc]):
+    expected = [tok._.wikt_mwe for tok in detector(docs[0])]
+
+    restored = pickle.loads(pickle.dumps(detector))
+    assert restored._data._lexicon is None
+    assert [tok._.wikt_mwe for tok in restored(docs[0])] == expected
+
+    restored.active_filters = {"VERB": ["f2"]}
+    restored = pickle.loads(pickle.dumps(restored))
+    assert restored.active_filters["NOUN"] == [f"f{i}" for i in range(1, 9)]
+
+
+def test_unknown_output_mode(nlp: Language):
+    with pytest.raises(ValueError):
+        MWEDetector(nlp, output_mode="chars")
+
+
+def test_spans_output_mode(detector: MWEDetector, docs: list[Doc]):
+    expected = [[tok._.wikt_mwe for tok in detector(doc)] for doc in docs]
+
+    detector.output_mode = "spans"
+    processed = list(detector.pipe(docs))
+    assert not any(key[0] == "._." for doc in processed for key in doc.user_data)
+    assert [[tok._.wikt_mwe for tok in doc] for doc in processed] == expected
+
+    spans = processed[2].spans["mwe"]
+    assert [(span.start, span.end, span.id) for span in spans] == [
+        (1, 2, 1),
+        (3, 4, 1),
+        (6, 7, 1),
+    ]
+    assert {span.label_ for span in spans} == {"mettre la main à la pâte:VERB"}
+    assert len(processed[1].spans["mwe"]) == 0
+
+    # Switching back drops the span group
+    detector.output_mode = "tokens"
+    assert "mwe" not in detector(processed[2]).spans
+    assert [tok._.wikt_mwe for tok in processed[2]] == expected[2]
+
+
+def test_spans_labels_follow_the_span_group(detector: MWEDetector, docs: list[Doc]):
+    detector.output_mode = "spans"
+    doc = detector(docs[0])
+    expected = [tok._.wikt_mwe for tok in doc]
+    assert [tok._.wikt_mwe for tok in doc] == expected
+
+    doc.spans["mwe"].append(Span(doc, 0, 1, label="test:NOUN", span_id=9))
+    assert doc[0]._.wikt_mwe == "|".join(
+        label for label in [expected[0], "9:test:NOUN"] if label != "*"
+    )
+    doc.spans["mwe"] = []
+    assert [tok._.wikt_mwe for tok in doc] == ["*"] * len(doc)
+
+
+def test_extension_without_getter_is_replaced():
+    Token.set_extension("wikt_mwe", default="*", force=True)
+    _register_extension()
+    assert Token.get_extension("wikt_mwe")[2] is get_wikt_mwe
+
+
+def test_labels_are_stored_sparsely(detector: MWEDetector, docs: list[Doc]):
+    doc = detector(docs[0])
+    assert len([key for key in doc.user_data if key[0] == "._."]) == 6
+
+    doc[0]._.wikt_mwe = "1:test:NOUN"
+    doc[1]._.wikt_mwe = "*"
+    assert [tok._.wikt_mwe for tok in doc][:2] == ["1:test:NOUN", "*"]
+    assert len([key for key in doc.user_data if key[0] == "._."]) == 6
+
+
+def test_spans_serialization(detector: MWEDetector, docs: list[Doc], nlp: Language):
+    detector.output_mode = "spans"
+    doc = detector(docs[0])
+    expected = [tok._.wikt_mwe for tok in doc]
+
+    doc_bin = DocBin(docs=[doc], store_user_data=True)
+    restored = list(DocBin().from_bytes(doc_bin.to_bytes()).get_docs(nlp.vocab))[0]
+    assert [tok._.wikt_mwe for tok in restored] == expected
+
+
+def test_filters_drop_the_doc(detector: MWEDetector, docs: list[Doc]):
+    detector.active_filters["NOUN"] = ["f5", "f6"]
+    detector(docs[0])
+    list(detector.pipe(docs))
+    detector.calibrate(docs)
+    assert detector.filters["f5"]._doc is None
+    assert detector.filters["f6"]._doc is None
+
+
+def test_edit_mwes(detector: MWEDetector, docs: list[Doc]):
+    assert "2:pomme de terre:NOUN" in [tok._.wikt_mwe for tok in detector(docs[0])]
+    detector.mwes["pomme de terre:NOUN"]["f2"] = []
+    assert "2:pomme de terre:NOUN" not in [tok._.wikt_mwe for tok in detector(docs[0])]
+
+    detector.mwes["le bon:DET"] = _mwe(["bon", "le"], "DET", [["DET", "ADJ"]], [5])
+    assert detector(docs[0])[0]._.wikt_mwe.endswith(":le bon:DET")
+
+    # Lists are handed out as tuples, as changes in place would be missed
+    assert detector.mwes["le bon:DET"]["lemmas"] == ("bon", "le")
+    with pytest.raises(AttributeError):
+        detector.mwes["le bon:DET"]["f4"].append(1)  # type: ignore
+    del detector.mwes["le bon:DET"]
+    assert "le bon:DET" not in detector.mwes
+    assert detector(docs[0])[0]._.wikt_mwe == "*"
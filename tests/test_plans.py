@@ -0,0 +1,84 @@
+import pytest
+from spacy.language import Language
+from spacy.tokens import Doc
+
+from mwe_detector.model import MWEDetector
+from mwe_detector.plans import order_filters
+
+from .conftest import _doc
+
+
+def test_order_filters():
+    # Cheap and selective filters first
+    assert order_filters("NOUN", ["f5", "f4", "f2"], {}) == ("f2", "f4", "f5")
+    stats = {("f5", "NOUN"): (1.0, 0.9), ("f2", "NOUN"): (1.0, 0.0)}
+    assert order_filters("NOUN", ["f5", "f4", "f2"], stats) == ("f5", "f4", "f2")
+    # Stats of another POS are not used
+    assert order_filters("VERB", ["f5", "f4", "f2"], stats) == ("f2", "f4", "f5")
+    # Ties keep the configured order
+    stats = {("f1", "NOUN"): (1.0, 0.5), ("f3", "NOUN"): (1.0, 0.5)}
+    assert order_filters("NOUN", ["f3", "f1"], stats) == ("f3", "f1")
+    assert order_filters("NOUN", [], {}) == ()
+
+
+def test_plans_follow_active_filters(detector: MWEDetector):
+    assert detector._plan("VERB") == ("f2", "f4", "f5")
+    detector.active_filters["VERB"].remove("f4")
+    assert detector._plan("VERB") == ("f2", "f5")
+    detector.active_filters = {"VERB": ["f8", "f6"]}
+    assert detector._plan("VERB") == ("f8", "f6")
+
+
+class _ExhaustiveDetector(MWEDetector):
+    # Applies all filters, as before execution plans
+    def _passes(self, doc, mwe, match_idx, plan):
+        return all(self.apply_filters(doc, mwe, match_idx))
+
+
+@pytest.mark.parametrize(
+    "active_filters",
+    [["f2", "f4", "f5"], ["f5", "f4", "f2"], ["f1", "f2", "f3", "f5", "f6", "f7"], []],
+)
+def test_short_circuit_keeps_matches(
+    detector: MWEDetector, docs: list[Doc], nlp: Language, active_filters: list[str]
+):
+    detector.mwes["aller bon train:VERB"]["f2"] = [["NOUN", "NOUN", "NOUN"]]
+    detector.active_filters = {"VERB": active_filters, "NOUN": active_filters}
+    exhaustive = _ExhaustiveDetector(nlp)
+    exhaustive._data = detector._data
+    for doc in docs:
+        expected = [tok._.wikt_mwe for tok in exhaustive(doc)]
+        assert [tok._.wikt_mwe for tok in detector(doc)] == expected
+
+
+def test_calibrate(detector: MWEDetector, docs: list[Doc]):
+    expected = [[tok._.wikt_mwe for tok in detector(doc)] for doc in docs]
+    detector.mwes["aller bon train:VERB"]["f2"] = [["NOUN", "NOUN", "NOUN"]]
+
+    stats = detector.calibrate(docs)
+    assert set(stats) == {
+        (f_key, pos) for f_key in ["f2", "f4", "f5"] for pos in ["VERB", "NOUN"]
+    }
+    assert stats["f2", "VERB"][1] == 0.5
+    assert stats["f5", "NOUN"][1] == 0.0
+    assert all(cost > 0 for cost, _ in stats.values())
+    # F5 never rejects, so it's applied last
+    assert detector._plan("NOUN")[-1] == "f5"
+    # Calibration doesn't annotate
+    assert [[tok._.wikt_mwe for tok in doc] for doc in docs] == expected
+
+
+def test_calibrate_without_pruning(detector: MWEDetector, nlp: Language):
+    # The gaps exceed the largest gap of F4, so the candidate is pruned during detection
+    doc = _doc(
+        nlp,
+        [
+            ("vont", "aller", "VERB"),
+            ("très", "très", "ADV"),
+            ("bon", "bon", "ADJ"),
+            ("et", "et", "CCONJ"),
+            ("train", "train", "NOUN"),
+        ],
+    )
+    assert ("f4", "VERB") not in detector.calibrate([doc], prune=True)
+    assert detector.calibrate([doc])["f4", "VERB"][1] == 1.0
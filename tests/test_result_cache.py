@@ -0,0 +1,84 @@
+import pickle
+
+import pytest
+from spacy.language import Language
+from spacy.tokens import Doc
+
+from mwe_detector.model import MWEDetector
+
+from .conftest import _doc
+
+
+@pytest.fixture
+def cached(detector: MWEDetector, nlp: Language):
+    cached = MWEDetector(nlp, result_cache_size=2)
+    cached._data = detector._data
+    return cached
+
+
+def _labels(doc: Doc):
+    return [tok._.wikt_mwe for tok in doc]
+
+
+def _copy(doc: Doc, nlp: Language):
+    return _doc(nlp, [(tok.text.upper(), tok.lemma_, tok.pos_) for tok in doc])
+
+
+@pytest.mark.parametrize("output_mode", ["tokens", "spans"])
+def test_replay(
+    detector: MWEDetector,
+    cached: MWEDetector,
+    docs: list[Doc],
+    nlp: Language,
+    output_mode: str,
+):
+    cached.output_mode = output_mode
+    expected = [_labels(detector(_copy(doc, nlp))) for doc in docs]
+    assert [_labels(cached(doc)) for doc in docs[:2]] == expected[:2]
+    assert cached.result_cache.stats()["misses"] == 2
+
+    # Same lemmas, POS, heads and morphs, but other words
+    assert [_labels(cached(_copy(doc, nlp))) for doc in docs[:2]] == expected[:2]
+    assert cached.result_cache.stats()["hits"] == 2
+
+    assert _labels(cached(docs[2])) == expected[2]
+    assert cached.result_cache.stats()["evictions"] == 1
+
+
+def test_pipe(
+    detector: MWEDetector, cached: MWEDetector, docs: list[Doc], nlp: Language
+):
+    expected = [_labels(detector(_copy(doc, nlp))) for doc in docs]
+    batch = [docs[0], _copy(docs[0], nlp), docs[1], _copy(docs[0], nlp)]
+    processed = list(cached.pipe(batch, batch_size=4))
+    assert processed == batch
+    assert [_labels(doc) for doc in processed] == [expected[0]] * 2 + [
+        expected[1],
+        expected[0],
+    ]
+
+    processed = list(cached.pipe([_copy(doc, nlp) for doc in docs[:2]]))
+    assert [_labels(doc) for doc in processed] == expected[:2]
+    assert cached.result_cache.stats()["hits"] == 2
+
+
+def test_invalidation(cached: MWEDetector, docs: list[Doc], nlp: Language):
+    assert "1:aller bon train:VERB" in _labels(cached(docs[0]))
+
+    cached.active_filters["VERB"].append("f3")
+    assert "1:aller bon train:VERB" not in _labels(cached(_copy(docs[0], nlp)))
+    assert len(cached.result_cache) == 1
+
+    cached.active_filters = {"VERB": ["f2"], "NOUN": ["f2"]}
+    cached.mwes["pomme de terre:NOUN"]["f2"] = []
+    assert _labels(cached(_copy(docs[0], nlp)))[1] == "*"
+    assert cached.result_cache.stats()["hits"] == 0
+
+    restored = pickle.loads(pickle.dumps(cached))
+    assert len(restored.result_cache) == 0
+    assert restored.result_cache.maxsize == 2
+
+
+def test_disabled_by_default(detector: MWEDetector, docs: list[Doc]):
+    detector(docs[0])
+    assert detector.result_cache.stats()["misses"] == 0
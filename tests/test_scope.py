@@ -0,0 +1,76 @@
+import pytest
+from spacy.language import Language
+from spacy.tokens import Doc
+
+from mwe_detector.model import MWEDetector
+
+
+def _concat(nlp: Language, docs: list[Doc]):
+    words, lemmas, pos, sent_starts = [], [], [], []
+    for doc in docs:
+        for tok in doc:
+            words.append(tok.text)
+            lemmas.append(tok.lemma_)
+            pos.append(tok.pos_)
+            sent_starts.append(tok.i == 0)
+    return Doc(nlp.vocab, words=words, lemmas=lemmas, pos=pos, sent_starts=sent_starts)
+
+
+def _labels(doc: Doc):
+    return [tok._.wikt_mwe for tok in doc]
+
+
+@pytest.fixture
+def scoped(detector: MWEDetector, nlp: Language):
+    def scoped(scope: str, **kwargs):
+        scoped = MWEDetector(nlp, scope=scope, **kwargs)
+        scoped._data = detector._data
+        return scoped
+
+    return scoped
+
+
+def test_unknown_scope(nlp: Language):
+    with pytest.raises(ValueError):
+        MWEDetector(nlp, scope="paragraph")
+    with pytest.raises(ValueError):
+        MWEDetector(nlp, scope="window", window_size=0)
+
+
+def test_sentence_scope(detector: MWEDetector, scoped, docs: list[Doc], nlp: Language):
+    # Every sentence is annotated as a doc of its own, matches are numbered throughout the doc
+    sentences = [docs[0], docs[2], docs[1], docs[0]]
+    expected = []
+    count = 0
+    for sentence in sentences:
+        labels = _labels(detector(sentence))
+        n_matches = len({label for label in labels if label != "*"})
+        for label in labels:
+            if label != "*":
+                number, key = label.split(":", 1)
+                label = str(int(number) + count) + ":" + key
+            expected.append(label)
+        count += n_matches
+
+    doc = _concat(nlp, sentences)
+    for batch_size in [1, 3]:
+        annotated = list(scoped("sentence").pipe([doc], batch_size=batch_size))[0]
+        assert _labels(annotated) == expected
+    assert _labels(scoped("sentence", output_mode="spans")(doc)) == expected
+
+
+def test_matches_across_sentences(scoped, nlp: Language, docs: list[Doc]):
+    # "pomme" ends the first sentence, "de terre" starts the second
+    first = docs[0][:2].as_doc()
+    second = docs[2][7:].as_doc()
+    doc = _concat(nlp, [first, second])
+    assert "1:pomme de terre:NOUN" in _labels(scoped("doc")(doc))
+    assert set(_labels(scoped("sentence")(doc))) == {"*"}
+    assert "1:pomme de terre:NOUN" in _labels(scoped("window", window_size=4)(doc))
+    assert set(_labels(scoped("window", window_size=2)(doc))) == {"*"}
+
+
+def test_unsentenced_doc(detector: MWEDetector, scoped, docs: list[Doc]):
+    expected = [_labels(detector(doc)) for doc in docs]
+    assert [_labels(scoped("sentence")(doc)) for doc in docs] == expected
+    assert [_labels(scoped("window", window_size=100)(doc)) for doc in docs] == expected
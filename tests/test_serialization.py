@@ -0,0 +1,127 @@
+import os
+
+import pytest
+import spacy
+import srsly
+
+from mwe_detector.model import MWEDetector
+from mwe_detector.serialization import read_binary, write_binary
+
+DATA = {
+    "mwes": {
+        "pomme de terre:NOUN": {
+            "pos": "NOUN",
+            "lemmas": ["pomme", "terre", "de"],
+            "f1": [["ADP", "NOUN", "NOUN"]],
+            "f2": [["NOUN", "ADP", "NOUN"], ["NOUN", "ADP", "PROPN"]],
+            "f3": [["NOUN", "ADP", "NOUN"]],
+            "f4": [1, 3],
+            "f5": None,
+            "f6": None,
+            "f7": ["Sing", "Plur"],
+            "f8": None,
+        },
+        "de rien:INTJ": {
+            "pos": "INTJ",
+            "lemmas": ["rien", "de"],
+            "f1": [],
+            "f2": [["ADP", "PRON"]],
+            "f3": [["NOUN", "ADP", "NOUN"], []],
+            "f4": [],
+            "f5": None,
+            "f6": None,
+            "f7": [],
+            "f8": None,
+        },
+    },
+    "active_filters": {"NOUN": ["f2", "f4", "f5"], "INTJ": []},
+}
+
+
+def test_roundtrip(tmp_path):
+    header_path, arrays_path = tmp_path / "data.msgpack", tmp_path / "data.npy"
+    write_binary(DATA, header_path, arrays_path)  # type: ignore
+    assert read_binary(header_path, arrays_path) == DATA
+
+
+def test_unsupported_version(tmp_path):
+    header_path, arrays_path = tmp_path / "data.msgpack", tmp_path / "data.npy"
+    write_binary(DATA, header_path, arrays_path)  # type: ignore
+    header = srsly.read_msgpack(header_path)
+    header["version"] += 1
+    srsly.write_msgpack(header_path, header)
+    with pytest.raises(ValueError):
+        read_binary(header_path, arrays_path)
+
+
+def test_detector_to_disk(tmp_path):
+    nlp = spacy.blank("fr")
+    detector = MWEDetector(nlp)
+    detector._data.from_dict(DATA)  # type: ignore
+    detector.to_disk(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == [
+        "fr_data.json",
+        "fr_data.msgpack",
+        "fr_data.npy",
+    ]
+
+    from_binary = MWEDetector(nlp).from_disk(str(tmp_path))
+    from_json = MWEDetector(nlp).from_disk(str(tmp_path), exclude=("binary",))
+    assert dict(from_binary.mwes) == dict(from_json.mwes) == DATA["mwes"]
+    assert dict(from_binary.active_filters) == DATA["active_filters"]
+
+    os.remove(tmp_path / "fr_data.npy")
+    assert dict(MWEDetector(nlp).from_disk(str(tmp_path)).mwes) == DATA["mwes"]
+
+
+def test_detector_to_disk_exclude(tmp_path):
+    detector = MWEDetector(spacy.blank("fr"))
+    detector._data.from_dict(DATA)  # type: ignore
+    detector.to_disk(str(tmp_path), exclude=("json",))
+    assert sorted(os.listdir(tmp_path)) == ["fr_data.msgpack", "fr_data.npy"]
+
+
+def test_detector_stale_binary(tmp_path):
+    nlp = spacy.blank("fr")
+    detector = MWEDetector(nlp)
+    detector._data.from_dict(DATA)  # type: ignore
+    detector.to_disk(str(tmp_path))
+
+    # The JSON data is retrained after the binary data was written
+    changed = {"mwes": {}, "active_filters": DATA["active_filters"]}
+    srsly.write_json(tmp_path / "fr_data.json", changed)
+    with pytest.warns(UserWarning):
+        assert dict(MWEDetector(nlp).from_disk(str(tmp_path)).mwes) == {}
+
+
+def test_detector_stale_binary_without_source(tmp_path):
+    nlp = spacy.blank("fr")
+    detector = MWEDetector(nlp)
+    detector._data.from_dict(DATA)  # type: ignore
+    detector.to_disk(str(tmp_path), exclude=("json",))
+    assert dict(MWEDetector(nlp).from_disk(str(tmp_path)).mwes) == DATA["mwes"]
+
+    changed = {"mwes": {}, "active_filters": DATA["active_filters"]}
+    srsly.write_json(tmp_path / "fr_data.json", changed)
+    header_mtime = os.stat(tmp_path / "fr_data.msgpack").st_mtime_ns
+    os.utime(tmp_path / "fr_data.json", ns=(header_mtime + 10**9, header_mtime + 10**9))
+    with pytest.warns(UserWarning):
+        assert dict(MWEDetector(nlp).from_disk(str(tmp_path)).mwes) == {}
+
+
+def test_detector_verify_binary(tmp_path):
+    nlp = spacy.blank("fr")
+    detector = MWEDetector(nlp)
+    detector._data.from_dict(DATA)  # type: ignore
+    detector.to_disk(str(tmp_path))
+
+    # Same size and modification time, only hashing the content tells them apart
+    json_path = tmp_path / "fr_data.json"
+    stat = os.stat(json_path)
+    json_path.write_bytes(json_path.read_bytes().replace(b"Sing", b"Dual"))
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    loaded = MWEDetector(nlp).from_disk(str(tmp_path))
+    assert loaded.mwes["pomme de terre:NOUN"]["f7"] == ("Sing", "Plur")
+    with pytest.warns(UserWarning):
+        verified = MWEDetector(nlp).from_disk(str(tmp_path), verify=True)
+    assert verified.mwes["pomme de terre:NOUN"]["f7"] == ("Dual", "Plur")
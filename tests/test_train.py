@@ -0,0 +1,129 @@
+import pickle
+import random
+
+import pytest
+import spacy
+from spacy.language import Language
+from spacy.tokens import Doc
+
+from mwe_detector.filters import F4, F7, UniqueList
+from mwe_detector.model import MWEDetector
+
+RANK_DICT = {"pomme": 2, "terre": 1}
+LEMMAS = ["pomme", "de", "terre", "aller", "bon", "train", "le", "main"]
+POS = ["NOUN", "ADP", "VERB", "ADJ", "DET"]
+
+
+@pytest.fixture
+def nlp():
+    return spacy.blank("fr")
+
+
+@pytest.fixture
+def examples(nlp: Language):
+    rng = random.Random(0)
+    docs = []
+    for _ in range(30):
+        n_tokens = rng.randrange(4, 10)
+        lemmas = [rng.choice(LEMMAS) for _ in range(n_tokens)]
+        pos = [rng.choice(POS) for _ in range(n_tokens)]
+        morphs = [
+            "Number=" + rng.choice(["Sing", "Plur"]) if tag == "NOUN" else ""
+            for tag in pos
+        ]
+        doc = Doc(nlp.vocab, words=lemmas, lemmas=lemmas, pos=pos, morphs=morphs)
+        labels = [[] for _ in range(n_tokens)]
+        for count in range(1, rng.randrange(1, 3) + 1):
+            match_idx = sorted(rng.sample(range(n_tokens), rng.randrange(2, 4)))
+            key = " ".join(lemmas[i] for i in match_idx) + ":" + pos[match_idx[0]]
+            for i in match_idx:
+                labels[i].append(f"{count}:{key}")
+        for tok, token_labels in zip(doc, labels):
+            tok._.wikt_mwe = "|".join(token_labels) or "*"
+        docs.append(doc)
+    return docs
+
+
+def _trained(nlp: Language, examples: list[Doc], **kwargs):
+    detector = MWEDetector(nlp)
+    detector.train(examples, RANK_DICT, **kwargs)
+    return detector._data.to_dict()
+
+
+def test_sharded_training(nlp: Language, examples: list[Doc]):
+    expected = _trained(nlp, examples)
+    assert len(expected["mwes"]) > 10
+    sharded = _trained(nlp, iter(examples), n_process=2, shard_size=7)
+    assert list(sharded["mwes"]) == list(expected["mwes"])
+    assert sharded == expected
+
+
+def test_merge(nlp: Language, examples: list[Doc]):
+    first, second = MWEDetector(nlp), MWEDetector(nlp)
+    first.train(examples[:12], RANK_DICT)
+    second.train(examples[12:], RANK_DICT)
+    merged = first.merge(second)._data.to_dict()
+
+    expected = _trained(nlp, examples)
+    assert list(merged["mwes"]) == list(expected["mwes"])
+    assert merged == expected
+
+
+def test_merge_keeps_order():
+    data = [1, 3]
+    F4.merge(data, [1, 2, 3, 5])
+    assert data == [1, 3, 2, 5]
+
+    numbers = ["Sing"]
+    F7.merge(numbers, {"Plur", "Sing"})
+    assert numbers == ["Sing", "Plur"]
+
+
+def test_labels_are_matched_exactly(nlp: Language):
+    words = ["pomme", "terre", "x", "x", "x", "x", "x", "x", "x", "x", "pomme", "terre"]
+    doc = Doc(nlp.vocab, words=words, lemmas=words, pos=["NOUN"] * len(words))
+    for i in [0, 1]:
+        doc[i]._.wikt_mwe = "1:pomme terre:NOUN"
+    for i in [10, 11]:
+        doc[i]._.wikt_mwe = "11:pomme terre:NOUN"
+
+    detector = MWEDetector(nlp)
+    assert detector._parse_labels(doc) == {
+        "1:pomme terre:NOUN": (0, 1),
+        "11:pomme terre:NOUN": (10, 11),
+    }
+    example = detector._doc_to_example_type(doc, "1:pomme terre:NOUN")
+    assert example["match_idx"] == (0, 1)
+
+    detector.train([doc])
+    assert detector.mwes["pomme terre:NOUN"]["f4"] == (1,)
+
+
+def test_unique_list():
+    patterns = UniqueList([["NOUN", "ADP"]])
+    assert ["NOUN", "ADP"] in patterns
+    assert ["ADP", "NOUN"] not in patterns
+    patterns.add(["NOUN", "ADP"])
+    patterns.add(["ADP", "NOUN"])
+    assert patterns == [["NOUN", "ADP"], ["ADP", "NOUN"]]
+
+    restored = pickle.loads(pickle.dumps(patterns))
+    assert type(restored) is UniqueList
+    assert ["ADP", "NOUN"] in restored
+
+
+def test_training_data_serializes_as_lists(
+    nlp: Language, examples: list[Doc], tmp_path
+):
+    detector = MWEDetector(nlp)
+    detector.train(examples, RANK_DICT)
+    data = detector._data.to_dict()
+    for mwe in data["mwes"].values():
+        assert all(type(mwe[f_key]) is list for f_key in ["f1", "f2", "f3", "f4"])
+
+    # Training continues on data read from disk
+    detector.to_disk(str(tmp_path), exclude=("binary",))
+    loaded = MWEDetector(nlp).from_disk(str(tmp_path))
+    loaded.train(examples, RANK_DICT)
+    detector.train(examples, RANK_DICT)
+    assert loaded._data.to_dict() == detector._data.to_dict()
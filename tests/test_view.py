@@ -0,0 +1,47 @@
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+from mwe_detector import view as view_module
+from mwe_detector.view import DocView, lemma_id, pos_id
+
+
+def test_doc_view():
+    doc = Doc(
+        Vocab(),
+        words=["Les", "pommes", "tombent"],
+        lemmas=["Le", "pomme", "tomber"],
+        pos=["DET", "NOUN", "VERB"],
+        heads=[1, 2, 2],
+        deps=["det", "nsubj", "ROOT"],
+        morphs=["Definite=Def|Number=Plur", "Gender=Fem|Number=Plur,Sing", ""],
+    )
+    view = DocView(doc)
+    assert len(view) == 3
+    assert view.lemmas == [lemma_id("le"), lemma_id("pomme"), lemma_id("tomber")]
+    assert view.pos == [pos_id("DET"), pos_id("NOUN"), pos_id("VERB")]
+    assert view.heads == [tok.head.i for tok in doc]
+    assert [view.number(i) for i in range(3)] == [
+        (tok.morph.get("Number") or [None])[0] for tok in doc
+    ]
+    assert view.lemma_positions == {lemma: [i] for i, lemma in enumerate(view.lemmas)}
+
+
+def test_doc_view_without_annotations():
+    doc = Doc(Vocab(), words=["a", "b"])
+    view = DocView(doc)
+    assert view.lemmas == [lemma_id(""), lemma_id("")]
+    assert view.pos == [pos_id(""), pos_id("")]
+    assert view.heads == [0, 1]
+    assert view.number(0) is None
+
+
+def test_lookups_are_bounded(monkeypatch):
+    monkeypatch.setattr(view_module, "LOOKUP_SIZE", 4)
+    vocab = Vocab()
+    for i in range(10):
+        words = [f"mot{i}-{j}" for j in range(3)]
+        doc = Doc(vocab, words=words, lemmas=words, morphs=[f"Number=N{i}"] * 3)
+        assert DocView(doc).lemmas == [lemma_id(word) for word in words]
+        assert DocView(doc).number(0) == f"N{i}"
+    assert len(view_module._lemma_ids) <= 4 + 3
+    assert len(view_module._numbers) <= 4
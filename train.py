@@ -7,8 +7,8 @@ import ujson as json
 import spacy
 from spacy.tokens import Doc, Token
 
-from config import SPACY_MODEL, TRAIN_DATA_DIR
-from load_cupt_to_spacy import load_cupt_to_spacy
+from config import CORPUS_CACHE_DIR, SPACY_MODEL, TRAIN_DATA_DIR
+from load_cupt_to_spacy import iter_cached_cupt_to_spacy, iter_cupt_to_spacy
 from mwe_detector.model import MWEDetector
 
 if __name__ == "__main__":
@@ -19,6 +19,17 @@ if __name__ == "__main__":
         type=str,
         help="Language code of the train file.",
     )
+    parser.add_argument(
+        "--n_process",
+        type=int,
+        default=1,
+        help="Number of processes to train with.",
+    )
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="Converts the train file without reading or writing the corpus cache.",
+    )
 
     args = parser.parse_args()
 
@@ -53,7 +64,10 @@ if __name__ == "__main__":
 
     train_file = latest_file
 
-    train_data = load_cupt_to_spacy(train_file, nlp)
+    if args.no_cache:
+        train_data = iter_cupt_to_spacy(train_file, nlp)
+    else:
+        train_data = iter_cached_cupt_to_spacy(train_file, nlp, CORPUS_CACHE_DIR)
 
     with open(
         os.path.join(TRAIN_DATA_DIR, f"{args.lang_code}_rank.json")
@@ -61,5 +75,5 @@ if __name__ == "__main__":
             rank_dict = json.load(f)
 
     mweDetector = MWEDetector(nlp)
-    mweDetector.train(train_data, rank_dict)
+    mweDetector.train(train_data, rank_dict, n_process=args.n_process)
     mweDetector.to_disk("mwe_detector/data")